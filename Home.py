@@ -7,17 +7,19 @@ A unified interface for working with multiple LLMs through the OpenRouter API.
 
 import os
 import sys
-import yaml
+import pandas as pd
 import streamlit as st
+from collections import defaultdict
 from datetime import datetime
 
-# Add the src directory to the path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Add the project root to the path (once; Streamlit re-executes this script on every rerun)
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
 # Import common utilities
 try:
-    from src.utils.rule_based_router import RuleBasedRouter
-    from src.utils.cost_tracker import CostTracker
+    from src.config.config_loader import load_config as load_yaml_config
 except ImportError as e:
     st.error(f"Error importing required modules: {e}")
     st.info("Make sure all dependencies are installed and the project structure is correct.")
@@ -32,7 +34,7 @@ st.set_page_config(
 )
 
 # Custom styles
-st.markdown("""
+CUSTOM_CSS = """
 <style>
     .main-container {
         padding: 2rem;
@@ -61,78 +63,111 @@ st.markdown("""
         border-bottom: 1px solid #e0e0e0;
     }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Collapse whitespace once so each rerun sends the smallest possible payload
+CUSTOM_CSS = " ".join(CUSTOM_CSS.split())
+
+# Static sidebar navigation block
+SIDEBAR_NAVIGATION = "\n\n".join([
+    "---",
+    "### Quick Navigation",
+    "Use the menu in the sidebar to navigate between:",
+    "\n".join([
+        "- **Home**: This overview page",
+        "- **Chatbot**: Interact with AI models",
+        "- **Model Comparison**: Compare model responses",
+        "- **Cost Dashboard**: Monitor API usage costs",
+    ]),
+    "---",
+])
 
 @st.cache_resource
 def load_config():
     """Load configuration from config.yaml"""
     try:
-        with open("config.yaml", "r") as f:
-            return yaml.safe_load(f)
+        return load_yaml_config("config.yaml")
     except Exception as e:
         st.error(f"Error loading configuration: {e}")
         return {}
 
 def check_api_key():
-    """Check if the API key is configured"""
-    if "OPENROUTER_API_KEY" in os.environ:
-        return True
-    else:
-        return False
+    """Check if the API key is configured (checked once per session)"""
+    if "has_api_key" not in st.session_state:
+        st.session_state.has_api_key = "OPENROUTER_API_KEY" in os.environ
+    return st.session_state.has_api_key
 
-def display_sidebar(config):
-    """Display sidebar elements"""
-    st.sidebar.title("OpenRouter LLM Suite")
-    
-    # API Key status
-    if check_api_key():
-        st.sidebar.success("✅ API Key configured")
-    else:
-        st.sidebar.error("❌ API Key not found")
-        st.sidebar.info("Set OPENROUTER_API_KEY in your environment or .env file")
+@st.cache_data
+def group_models_by_provider(models):
+    """Group model entries by provider (cached, recomputed only when models change)"""
+    providers = defaultdict(list)
     
-    st.sidebar.markdown("---")
-    
-    # Information
-    st.sidebar.markdown("### Quick Navigation")
-    st.sidebar.markdown("Use the menu in the sidebar to navigate between:")
-    st.sidebar.markdown("- **Home**: This overview page")
-    st.sidebar.markdown("- **Chatbot**: Interact with AI models")
-    st.sidebar.markdown("- **Model Comparison**: Compare model responses")
-    st.sidebar.markdown("- **Cost Dashboard**: Monitor API usage costs")
-    
-    st.sidebar.markdown("---")
-    
-    # Show available models
-    st.sidebar.markdown("### Available Models")
-    models = config.get("models", {})
-    providers = {}
-    
-    # Group models by provider
     for model_id, model_info in models.items():
         provider = model_info.get("provider", "Unknown")
-        if provider not in providers:
-            providers[provider] = []
         providers[provider].append({
             "id": model_id,
             "name": model_info.get("name", model_id),
             "cost": model_info.get("cost_per_1k_tokens", 0)
         })
     
+    return dict(providers)
+
+@st.cache_data
+def build_models_dataframe(models):
+    """Build the formatted model table (cached, recomputed only when models change)"""
+    return pd.DataFrame([
+        {
+            "Model": model_info.get("name", model_id),
+            "Provider": model_info.get("provider", "Unknown"),
+            "Cost (per 1K tokens)": f"${model_info.get('cost_per_1k_tokens', 0):.6f}",
+            "Max Tokens": f"{model_info.get('max_tokens', 0):,}",
+            "Context Window": f"{model_info.get('context_length', 'Unknown')}"
+        }
+        for model_id, model_info in models.items()
+    ])
+
+@st.cache_data(ttl=3600)
+def today_str():
+    """Return today's date as YYYY-MM-DD (cached for an hour)"""
+    return datetime.now().strftime('%Y-%m-%d')
+
+def display_sidebar(config):
+    """Display sidebar elements (call inside ``with st.sidebar``)"""
+    st.title("OpenRouter LLM Suite")
+    
+    # API Key status
+    if check_api_key():
+        st.success("✅ API Key configured")
+    else:
+        st.error("❌ API Key not found")
+        st.info("Set OPENROUTER_API_KEY in your environment or .env file")
+    
+    # Information (static, sent as a single element)
+    st.markdown(SIDEBAR_NAVIGATION)
+    
+    # Show available models
+    st.markdown("### Available Models")
+    providers = group_models_by_provider(config.get("models", {}))
+    
     # Show providers and model counts
-    for provider, provider_models in providers.items():
-        st.sidebar.markdown(f"**{provider}** ({len(provider_models)} models)")
+    st.markdown("\n\n".join(
+        f"**{provider}** ({len(provider_models)} models)"
+        for provider, provider_models in providers.items()
+    ))
     
-    st.sidebar.markdown("---")
-    st.sidebar.caption(f"Last updated: {datetime.now().strftime('%Y-%m-%d')}")
+    st.markdown("---")
+    st.caption(f"Last updated: {today_str()}")
 
 def main():
     """Main application function"""
+    # Inject custom styles
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    
     # Load configuration
     config = load_config()
     
     # Display sidebar
-    display_sidebar(config)
+    with st.sidebar:
+        display_sidebar(config)
     
     # Main area
     st.title("🤖 OpenRouter LLM Suite")
@@ -229,20 +264,8 @@ def main():
     # Get model information from config
     models = config.get("models", {})
     if models:
-        # Create model data for table
-        model_data = []
-        
-        for model_id, model_info in models.items():
-            model_data.append({
-                "Model": model_info.get("name", model_id),
-                "Provider": model_info.get("provider", "Unknown"),
-                "Cost (per 1K tokens)": f"${model_info.get('cost_per_1k_tokens', 0):.6f}",
-                "Max Tokens": f"{model_info.get('max_tokens', 0):,}",
-                "Context Window": f"{model_info.get('context_length', 'Unknown')}"
-            })
-        
         # Display as table with filters
-        st.dataframe(model_data, use_container_width=True)
+        st.dataframe(build_models_dataframe(models), use_container_width=True)
     else:
         st.info("No model information available. Please check your config.yaml file.")
     
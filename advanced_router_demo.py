@@ -7,13 +7,62 @@ route prompts to different models based on metrics and prompt content.
 """
 
 import os
-import json
 import time
 from typing import Dict, List, Any
 import streamlit as st
-from src.utils.advanced_router import AdvancedRouter
 from src.config.config_loader import load_config
 
+# Router optimization targets offered in the sidebar
+OPTIMIZATION_TARGETS = ("balanced", "speed", "cost", "quality")
+
+@st.cache_resource
+def _cached_config():
+    """Load configuration once and reuse it across reruns"""
+    return load_config()
+
+def display_chat_history(messages):
+    """Replay prior chat turns"""
+    for message in messages:
+        with st.chat_message(message["role"]):
+            st.write(message["content"])
+            
+            # Show model info for assistant messages
+            if message["role"] == "assistant" and "model" in message:
+                with st.expander("Message details"):
+                    st.write(f"**Model:** {message.get('model', 'Unknown')}")
+                    st.write(f"**Tokens:** {message.get('tokens', 'Unknown')}")
+                    st.write(f"**Latency:** {message.get('latency', 'Unknown'):.2f}s")
+                    st.write(f"**Cost:** ${message.get('cost', 0):.5f}")
+
+def display_metrics(router):
+    """Display per-model performance metrics"""
+    if st.session_state.model_metrics:
+        st.subheader("Model Performance Metrics")
+    
+        # Create columns for metrics
+        col1, col2, col3 = st.columns(3)
+    
+        with col1:
+            st.write("### Average Latency")
+            for model_id, totals in st.session_state.model_metrics.items():
+                if totals["count"]:
+                    model_name = router.models.get(model_id, {}).get("name", model_id)
+                    st.metric(model_name, f"{totals['latency'] / totals['count']:.2f}s")
+    
+        with col2:
+            st.write("### Average Tokens")
+            for model_id, totals in st.session_state.model_metrics.items():
+                if totals["count"]:
+                    model_name = router.models.get(model_id, {}).get("name", model_id)
+                    st.metric(model_name, f"{totals['tokens'] // totals['count']}")
+    
+        with col3:
+            st.write("### Total Cost")
+            for model_id, totals in st.session_state.model_metrics.items():
+                if totals["count"]:
+                    model_name = router.models.get(model_id, {}).get("name", model_id)
+                    st.metric(model_name, f"${totals['cost']:.5f}")
+
 def main():
     st.set_page_config(
         page_title="Advanced LLM Router Demo",
@@ -32,7 +81,7 @@ def main():
     
     # Load configuration
     try:
-        config = load_config()
+        config = _cached_config()
     except Exception as e:
         st.error(f"Error loading configuration: {str(e)}")
         st.stop()
@@ -41,6 +90,9 @@ def main():
     if "optimization_target" not in config:
         config["optimization_target"] = "balanced"
     
+    # Imported here so the page header renders before pandas and the API client load
+    from src.utils.advanced_router import AdvancedRouter
+    
     # Initialize the advanced router
     try:
         router = AdvancedRouter(config)
@@ -57,8 +109,8 @@ def main():
         # Optimization target
         optimization_target = st.selectbox(
             "Optimization Target",
-            options=["balanced", "speed", "cost", "quality"],
-            index=["balanced", "speed", "cost", "quality"].index(config.get("optimization_target", "balanced"))
+            options=OPTIMIZATION_TARGETS,
+            index=OPTIMIZATION_TARGETS.index(config.get("optimization_target", "balanced"))
         )
         
         if optimization_target != router.optimization_target:
@@ -81,21 +133,15 @@ def main():
     if "messages" not in st.session_state:
         st.session_state.messages = []
     
+    # Role/content-only history sent to the API, appended in lockstep with messages
+    if "api_messages" not in st.session_state:
+        st.session_state.api_messages = []
+    
     if "model_metrics" not in st.session_state:
         st.session_state.model_metrics = {}
     
     # Display chat history
-    for message in st.session_state.messages:
-        with st.chat_message(message["role"]):
-            st.write(message["content"])
-            
-            # Show model info for assistant messages
-            if message["role"] == "assistant" and "model" in message:
-                with st.expander("Message details"):
-                    st.write(f"**Model:** {message.get('model', 'Unknown')}")
-                    st.write(f"**Tokens:** {message.get('tokens', 'Unknown')}")
-                    st.write(f"**Latency:** {message.get('latency', 'Unknown'):.2f}s")
-                    st.write(f"**Cost:** ${message.get('cost', 0):.5f}")
+    display_chat_history(st.session_state.messages)
     
     # Chat input
     prompt = st.chat_input("Enter your message here")
@@ -103,14 +149,12 @@ def main():
     if prompt:
         # Add user message to chat
         st.session_state.messages.append({"role": "user", "content": prompt})
+        st.session_state.api_messages.append({"role": "user", "content": prompt})
         
         # Display user message
         with st.chat_message("user"):
             st.write(prompt)
         
-        # Create messages array for API
-        messages = [{"role": m["role"], "content": m["content"]} for m in st.session_state.messages]
-        
         # Use the router to select model and get response
         with st.spinner("Thinking..."):
             try:
@@ -122,7 +166,7 @@ def main():
                 
                 # Get response
                 start_time = time.time()
-                response_text, usage_stats = router.send_prompt(messages)
+                response_text, usage_stats = router.send_prompt(st.session_state.api_messages, selected_model)
                 total_time = time.time() - start_time
                 
                 # Get cost information
@@ -139,16 +183,19 @@ def main():
                     "latency": total_time,
                     "cost": estimated_cost
                 })
+                st.session_state.api_messages.append({"role": "assistant", "content": response_text})
                 
-                # Update metrics display
+                # Update running totals for the metrics display
                 if selected_model not in st.session_state.model_metrics:
-                    st.session_state.model_metrics[selected_model] = []
+                    st.session_state.model_metrics[selected_model] = {
+                        "count": 0, "latency": 0.0, "tokens": 0, "cost": 0.0
+                    }
                 
-                st.session_state.model_metrics[selected_model].append({
-                    "tokens": total_tokens,
-                    "latency": total_time,
-                    "cost": estimated_cost
-                })
+                totals = st.session_state.model_metrics[selected_model]
+                totals["count"] += 1
+                totals["latency"] += total_time
+                totals["tokens"] += total_tokens
+                totals["cost"] += estimated_cost
                 
                 # Display assistant message
                 with st.chat_message("assistant"):
@@ -163,35 +210,7 @@ def main():
                 st.error(f"Error: {str(e)}")
     
     # Metrics visualization
-    if st.session_state.model_metrics:
-        st.subheader("Model Performance Metrics")
-        
-        # Create columns for metrics
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.write("### Average Latency")
-            for model_id, metrics in st.session_state.model_metrics.items():
-                if metrics:
-                    avg_latency = sum(m["latency"] for m in metrics) / len(metrics)
-                    model_name = router.models.get(model_id, {}).get("name", model_id)
-                    st.metric(model_name, f"{avg_latency:.2f}s")
-        
-        with col2:
-            st.write("### Average Tokens")
-            for model_id, metrics in st.session_state.model_metrics.items():
-                if metrics:
-                    avg_tokens = sum(m["tokens"] for m in metrics) / len(metrics)
-                    model_name = router.models.get(model_id, {}).get("name", model_id)
-                    st.metric(model_name, f"{int(avg_tokens)}")
-        
-        with col3:
-            st.write("### Total Cost")
-            for model_id, metrics in st.session_state.model_metrics.items():
-                if metrics:
-                    total_cost = sum(m["cost"] for m in metrics)
-                    model_name = router.models.get(model_id, {}).get("name", model_id)
-                    st.metric(model_name, f"${total_cost:.5f}")
+    display_metrics(router)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,10 +1,13 @@
 import streamlit as st
 import yaml
 import os
-from router import ModelRouter
-from src.components.chat_ui import ChatUI
 from src.config.config_loader import load_config
 
+@st.cache_resource
+def _cached_config():
+    """Load configuration once and reuse it across reruns"""
+    return load_config()
+
 def main():
     # Set up page configuration
     st.set_page_config(
@@ -25,11 +28,15 @@ def main():
     
     # Load model configurations from YAML
     try:
-        config = load_config()
+        config = _cached_config()
     except Exception as e:
         st.error(f"Error loading configuration: {str(e)}")
         st.stop()
     
+    # Imported here so the page header renders before the router modules load
+    from router import ModelRouter
+    from src.components.chat_ui import ChatUI
+    
     # Initialize the model router
     try:
         router = ModelRouter(config)
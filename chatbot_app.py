@@ -1,11 +1,11 @@
 import streamlit as st
-import yaml
+from src.config.config_loader import load_config as load_yaml_config
 
+@st.cache_data(ttl=300)
 def load_config():
-    """Load configuration from config.yaml"""
+    """Load configuration from config.yaml (refreshed every 5 minutes)"""
     try:
-        with open("config.yaml", "r") as f:
-            return yaml.safe_load(f)
+        return load_yaml_config("config.yaml")
     except Exception as e:
         st.error(f"Error loading configuration: {e}")
         return {}
@@ -5,27 +5,47 @@ OpenRouter Cost Estimator
 A utility for estimating costs of using different models with OpenRouter.
 """
 
-import os
+import sys
 import argparse
-import yaml
-import tiktoken
+import functools
+import concurrent.futures
 import re
-from typing import Dict, List, Any, Union, Optional
-from pathlib import Path
+from typing import Dict, List, Any
 
 # Default config location
 CONFIG_PATH = "config.yaml"
 
+# Model ID markers mapped to tokenizer families, in priority order
+MODEL_FAMILIES = (
+    ("gpt-4", "gpt-4"),
+    ("gpt", "gpt-3.5-turbo"),
+    ("claude", "claude"),
+    ("mistral", "mistral"),
+)
+MODEL_FAMILY_PATTERN = re.compile("|".join(re.escape(marker) for marker, _ in MODEL_FAMILIES))
+
+# Table row templates for the model list and the cost comparison
+MODEL_LIST_ROW = "{model_id:<30} {name:<20} ${cost:<19.5f} {max_tokens:<12}"
+COMPARISON_ROW = "{model_id:<30} {prompt_tokens:<15} {completion_tokens:<15} {total_tokens:<10} ${cost:.5f}"
+
 def load_config(config_path: str = CONFIG_PATH) -> Dict[str, Any]:
-    """Load configuration from YAML file"""
+    """Load configuration from YAML file (cached on file mtime and size)"""
+    # Imported here so PyYAML only loads when a config is actually read
+    from src.config.config_loader import load_config as load_yaml_config
+    
     try:
-        with open(config_path, 'r') as f:
-            config = yaml.safe_load(f)
-        return config
+        return load_yaml_config(config_path)
     except Exception as e:
         print(f"Error loading config: {e}")
         return {"models": {}}
 
+@functools.lru_cache(maxsize=8)
+def get_encoding(model_family: str):
+    """Return the tiktoken encoding for a model family (cached per family)"""
+    # Imported on first use; Claude and Mistral estimates never need tiktoken
+    import tiktoken
+    return tiktoken.encoding_for_model(model_family)
+
 def estimate_tokens(text: str, model_family: str = "gpt-3.5-turbo") -> int:
     """
     Estimate the number of tokens in a text string
@@ -40,7 +60,7 @@ def estimate_tokens(text: str, model_family: str = "gpt-3.5-turbo") -> int:
     try:
         # Use tiktoken for OpenAI-compatible models
         if "gpt" in model_family.lower():
-            encoding = tiktoken.encoding_for_model(model_family)
+            encoding = get_encoding(model_family)
             return len(encoding.encode(text))
         
         # For Claude models (rule of thumb)
@@ -112,19 +132,15 @@ def estimate_completion_tokens(prompt_tokens: int, model_id: str) -> int:
         # Default case
         return int(prompt_tokens * 1.5)
 
+@functools.lru_cache(maxsize=128)
 def get_model_family(model_id: str) -> str:
     """Determine the model family for tokenization purposes"""
-    if "gpt" in model_id:
-        if "gpt-4" in model_id:
-            return "gpt-4"
-        else:
-            return "gpt-3.5-turbo"
-    elif "claude" in model_id:
-        return "claude"
-    elif "mistral" in model_id:
-        return "mistral"
-    else:
-        return "gpt-3.5-turbo"  # default fallback
+    # One regex scan collects every family marker; pick the highest-priority one
+    matches = set(MODEL_FAMILY_PATTERN.findall(model_id))
+    for marker, family in MODEL_FAMILIES:
+        if marker in matches:
+            return family
+    return "gpt-3.5-turbo"  # default fallback
 
 def list_available_models(config: Dict[str, Any]):
     """List all available models and their pricing"""
@@ -134,16 +150,22 @@ def list_available_models(config: Dict[str, Any]):
         print("No models found in configuration.")
         return
     
-    print("\n=== Available Models ===")
-    print(f"{'Model ID':<30} {'Name':<20} {'Cost per 1K tokens':<20} {'Max Tokens':<12}")
-    print("-" * 80)
+    # Build the whole table and write it once
+    lines = [
+        "\n=== Available Models ===",
+        f"{'Model ID':<30} {'Name':<20} {'Cost per 1K tokens':<20} {'Max Tokens':<12}",
+        "-" * 80
+    ]
     
     for model_id, model_info in models.items():
-        name = model_info.get("name", "Unknown")
-        cost = model_info.get("cost_per_1k_tokens", "Unknown")
-        max_tokens = model_info.get("max_tokens", "Unknown")
-        
-        print(f"{model_id:<30} {name:<20} ${cost:<19.5f} {max_tokens:<12}")
+        lines.append(MODEL_LIST_ROW.format_map({
+            "model_id": model_id,
+            "name": model_info.get("name", "Unknown"),
+            "cost": model_info.get("cost_per_1k_tokens", "Unknown"),
+            "max_tokens": model_info.get("max_tokens", "Unknown")
+        }))
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 def main():
     parser = argparse.ArgumentParser(description="Estimate costs for OpenRouter API usage")
@@ -220,18 +242,37 @@ def main():
             
         else:
             # Compare all models
-            print("\n=== Cost Comparison ===")
-            print(f"{'Model':<30} {'Prompt Tokens':<15} {'Completion':<15} {'Total':<10} {'Cost':<10}")
-            print("-" * 80)
+            lines = [
+                "\n=== Cost Comparison ===",
+                f"{'Model':<30} {'Prompt Tokens':<15} {'Completion':<15} {'Total':<10} {'Cost':<10}",
+                "-" * 80
+            ]
+            
+            # Prompt token counts depend only on the model family, so tokenize once per family,
+            # in parallel (tiktoken releases the GIL while encoding)
+            families = list({get_model_family(model_id) for model_id in models})
+            with concurrent.futures.ThreadPoolExecutor(max_workers=max(1, min(8, len(families)))) as executor:
+                family_tokens = dict(zip(
+                    families,
+                    executor.map(lambda family: estimate_tokens(full_text, family), families)
+                ))
             
             for model_id, model_info in models.items():
-                model_family = get_model_family(model_id)
-                prompt_tokens = estimate_tokens(full_text, model_family)
+                prompt_tokens = family_tokens[get_model_family(model_id)]
                 completion_tokens = estimate_completion_tokens(prompt_tokens, model_id)
                 total_tokens = prompt_tokens + completion_tokens
                 cost = calculate_cost(total_tokens, model_id, config)
                 
-                print(f"{model_id:<30} {prompt_tokens:<15} {completion_tokens:<15} {total_tokens:<10} ${cost:.5f}")
+                lines.append(COMPARISON_ROW.format_map({
+                    "model_id": model_id,
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": total_tokens,
+                    "cost": cost
+                }))
+            
+            # Write the whole table at once
+            sys.stdout.write("\n".join(lines) + "\n")
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -21,19 +21,24 @@ from pathlib import Path
 
 # Try to import dotenv, install if missing
 try:
-    from dotenv import load_dotenv, set_key
+    from dotenv import load_dotenv
     DOTENV_AVAILABLE = True
 except ImportError:
     DOTENV_AVAILABLE = False
     print("python-dotenv not installed. Installing...")
     try:
         subprocess.check_call([sys.executable, "-m", "pip", "install", "python-dotenv"])
-        from dotenv import load_dotenv, set_key
+        from dotenv import load_dotenv
         DOTENV_AVAILABLE = True
         print("Successfully installed python-dotenv")
     except Exception as e:
         print(f"Failed to install python-dotenv: {e}")
 
+# Patterns for the API key line in .env and for a well-formed key
+ENV_KEY_PATTERN = re.compile(r'OPENROUTER_API_KEY\s*=\s*([^\n#]+)')
+ENV_KEY_LINE_PATTERN = re.compile(r'OPENROUTER_API_KEY\s*=\s*[^\n#]*')
+VALID_KEY_PATTERN = re.compile(r'sk-[^ \'"]{17,}')
+
 # Colors for terminal output
 class Colors:
     RESET = "\033[0m"
@@ -60,6 +65,10 @@ def print_info(message):
 
 def check_api_key_format(api_key):
     """Check if the API key format looks valid"""
+    # Fast path: one regex match covers every check below
+    if VALID_KEY_PATTERN.fullmatch(api_key):
+        return True, "API key format looks valid"
+    
     # Most OpenRouter keys start with 'sk-'
     if not api_key.startswith('sk-'):
         return False, "API key should start with 'sk-'"
@@ -78,7 +87,13 @@ def check_api_key_format(api_key):
     return True, "API key format looks valid"
 
 def check_env_file():
-    """Check if .env file exists and contains the API key"""
+    """
+    Check if .env file exists and contains the API key
+    
+    Returns:
+        Tuple of (exists, api_key or None, file content or None); the content is
+        handed to create_or_update_env_file so the file is only read once
+    """
     env_path = Path('.env')
     example_path = Path('.env.example')
     
@@ -88,27 +103,26 @@ def check_env_file():
             print_info("You should copy .env.example to .env and fill in your API key")
         else:
             print_warning(".env file not found. We'll create one for you.")
-        return False, None
+        return False, None, None
     
     # Read the .env file
-    with open(env_path, 'r') as f:
-        env_content = f.read()
+    env_content = env_path.read_text(encoding='utf-8')
     
     # Check if it contains OPENROUTER_API_KEY
-    match = re.search(r'OPENROUTER_API_KEY\s*=\s*([^\n#]+)', env_content)
+    match = ENV_KEY_PATTERN.search(env_content)
     if not match:
         print_warning("OPENROUTER_API_KEY not found in .env file")
-        return True, None
+        return True, None, env_content
     
     api_key = match.group(1).strip()
     is_valid, message = check_api_key_format(api_key)
     
     if not is_valid:
         print_warning(f"Found API key in .env file but {message.lower()}")
-        return True, api_key
+        return True, api_key, env_content
     
     print_success("Found valid API key in .env file")
-    return True, api_key
+    return True, api_key, env_content
 
 def test_api_key(api_key):
     """Test the API key against the OpenRouter API"""
@@ -140,37 +154,32 @@ def test_api_key(api_key):
     except Exception as e:
         return False, f"Error testing API key: {str(e)}"
 
-def create_or_update_env_file(api_key):
-    """Create or update the .env file with the API key"""
+def create_or_update_env_file(api_key, content=None):
+    """
+    Create or update the .env file with the API key
+    
+    Args:
+        api_key: The API key to store
+        content: Current .env content from check_env_file, or None if there is no file
+    """
     env_path = Path('.env')
     
-    if env_path.exists():
-        # Update existing file
-        if DOTENV_AVAILABLE:
-            set_key(str(env_path), "OPENROUTER_API_KEY", api_key)
-            print_success("Updated API key in .env file")
+    if content is not None:
+        # Update the existing content in memory and write it back once
+        if ENV_KEY_LINE_PATTERN.search(content):
+            content = ENV_KEY_LINE_PATTERN.sub(f'OPENROUTER_API_KEY={api_key}', content)
         else:
-            # Manually update the file
-            with open(env_path, 'r') as f:
-                content = f.read()
-            
-            if "OPENROUTER_API_KEY" in content:
-                content = re.sub(
-                    r'OPENROUTER_API_KEY\s*=\s*[^\n#]*', 
-                    f'OPENROUTER_API_KEY={api_key}', 
-                    content
-                )
-            else:
-                content += f"\nOPENROUTER_API_KEY={api_key}\n"
-            
-            with open(env_path, 'w') as f:
-                f.write(content)
-            print_success("Updated API key in .env file")
+            content += f"\nOPENROUTER_API_KEY={api_key}\n"
+        
+        env_path.write_text(content, encoding='utf-8')
+        print_success("Updated API key in .env file")
     else:
         # Create new file
-        with open(env_path, 'w') as f:
-            f.write(f"# OpenRouter API Key - Get yours at https://openrouter.ai/keys\n")
-            f.write(f"OPENROUTER_API_KEY={api_key}\n")
+        env_path.write_text(
+            "# OpenRouter API Key - Get yours at https://openrouter.ai/keys\n"
+            f"OPENROUTER_API_KEY={api_key}\n",
+            encoding='utf-8'
+        )
         print_success("Created .env file with API key")
 
 def main():
@@ -193,7 +202,7 @@ def main():
         print_warning("OPENROUTER_API_KEY not found in environment variables")
     
     # Check .env file
-    env_exists, env_api_key = check_env_file()
+    env_exists, env_api_key, env_content = check_env_file()
     
     # Determine which API key to use
     if not api_key and not env_api_key:
@@ -222,7 +231,7 @@ def main():
             
             # Make sure the API key is in the .env file
             if not env_exists or not env_api_key or env_api_key != api_key:
-                create_or_update_env_file(api_key)
+                create_or_update_env_file(api_key, env_content)
                 
             print_header("Final Steps")
             print_success("Your OpenRouter API key is properly configured!")
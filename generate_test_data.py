@@ -7,8 +7,9 @@ This script generates sample cost data for testing the dashboard.
 
 import os
 import yaml
-import random
 import datetime
+import numpy as np
+import pandas as pd
 from src.utils.cost_tracker import CostTracker
 
 def load_config():
@@ -33,36 +34,35 @@ def generate_test_data(days=7, calls_per_day=5):
     print(f"Generating test data for {days} days with {calls_per_day} calls per day")
     print(f"Using models: {', '.join(models)}")
     
-    # Generate data for the past N days
-    for day in range(days):
-        # Create date for this batch
-        date = datetime.datetime.now() - datetime.timedelta(days=day)
-        session_id = date.strftime("%Y%m%d%H%M%S")
-        
-        # Generate multiple calls per day
-        for call in range(calls_per_day):
-            # Select random model
-            model = random.choice(models)
-            
-            # Generate random token counts
-            prompt_tokens = random.randint(10, 500)
-            completion_tokens = random.randint(50, 1000)
-            total_tokens = prompt_tokens + completion_tokens
-            
-            # Log the API call
-            try:
-                tracker.log_api_call(
-                    model=model,
-                    usage_stats={
-                        "prompt_tokens": prompt_tokens,
-                        "completion_tokens": completion_tokens,
-                        "total_tokens": total_tokens
-                    },
-                    session_id=session_id
-                )
-                print(f"Added data point: {date.strftime('%Y-%m-%d')} - {model} - {total_tokens} tokens")
-            except Exception as e:
-                print(f"Error logging API call: {e}")
+    # Draw every call's model and token counts at once
+    rng = np.random.default_rng()
+    n = days * calls_per_day
+    call_models = np.array(models)[rng.integers(0, len(models), size=n)]
+    prompt_tokens = rng.integers(10, 501, size=n)
+    completion_tokens = rng.integers(50, 1001, size=n)
+    call_days = np.repeat(np.arange(days), calls_per_day)
+    
+    # One date and session per day, going back from now
+    now = datetime.datetime.now()
+    dates = [now - datetime.timedelta(days=day) for day in range(days)]
+    session_ids = np.array([date.strftime("%Y%m%d%H%M%S") for date in dates])
+    
+    # Build the frame column by column in one call
+    calls = pd.DataFrame({
+        "timestamp": pd.Timestamp(now) - pd.to_timedelta(call_days, unit="D"),
+        "model": call_models,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+        "session_id": session_ids[call_days]
+    })
+    
+    # Log all calls with one write
+    try:
+        tracker.append_dataframe(calls)
+        print(f"Added {len(calls)} data points")
+    except Exception as e:
+        print(f"Error logging API calls: {e}")
     
     # Get summary after generation
     session_summary = tracker.get_session_summary()
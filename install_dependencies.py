@@ -5,35 +5,74 @@ Install Dependencies
 This script installs the required dependencies for the OpenRouter chatbot.
 """
 
+import argparse
 import subprocess
 import sys
 import os
 
-def install_dependencies():
-    """Install the required dependencies."""
+# Needed by model_client.py and the OpenRouter API client
+CORE_DEPENDENCIES = [
+    "requests",
+    "pyyaml",
+    "python-dotenv",
+]
+
+# Groups the chatbot and router demos need on top of the core dependencies
+APP_EXTRAS = ("dashboard", "tokens")
+
+# Optional groups, selected with --with
+EXTRA_DEPENDENCIES = {
+    "dashboard": ["pandas", "streamlit"],  # Streamlit apps and cost tracking (used by the routers)
+    "tokens": ["tiktoken"],  # Token estimation (used by the routers)
+    "fast": ["httpx[http2]", "orjson"],  # Concurrent HTTP/2 requests and fast JSON
+}
+
+def install_group(name, packages):
+    """Install one group of packages with a single pip run."""
+    # One pip run per group so the resolver and cache are shared
+    print(f"Installing {name} dependencies: {', '.join(packages)}...")
+    try:
+        subprocess.check_call([
+            sys.executable, "-m", "pip", "install",
+            "--upgrade-strategy", "only-if-needed",
+            *packages
+        ])
+        print(f"Successfully installed {name} dependencies")
+    except subprocess.CalledProcessError as e:
+        print(f"Batch install failed ({e}); installing packages one at a time...")
+        
+        # Fall back to one package at a time so a single failure doesn't block the rest
+        for package in packages:
+            print(f"Installing {package}...")
+            try:
+                subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+                print(f"Successfully installed {package}")
+            except subprocess.CalledProcessError as e:
+                print(f"Failed to install {package}. Error: {e}")
+
+def install_dependencies(extras=()):
+    """Install the core dependencies plus any selected extras."""
     print("Installing dependencies...")
     
-    # List of required packages
-    dependencies = [
-        "requests",
-        "pyyaml",
-        "python-dotenv",
-        "pandas",
-        "streamlit",
-        "tiktoken",  # For token estimation
-    ]
-    
-    # Install each dependency
-    for package in dependencies:
-        print(f"Installing {package}...")
-        try:
-            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
-            print(f"Successfully installed {package}")
-        except subprocess.CalledProcessError as e:
-            print(f"Failed to install {package}. Error: {e}")
+    install_group("core", CORE_DEPENDENCIES)
+    for extra in extras:
+        install_group(extra, EXTRA_DEPENDENCIES[extra])
     
     print("\nDependencies installation completed.")
 
+def parse_extras(value):
+    """Parse a comma-separated list of extras (or "all")."""
+    extras = [extra.strip() for extra in value.split(",") if extra.strip()]
+    if "all" in extras:
+        return list(EXTRA_DEPENDENCIES)
+    unknown = [extra for extra in extras if extra not in EXTRA_DEPENDENCIES]
+    if unknown:
+        raise argparse.ArgumentTypeError(
+            f"unknown extra(s): {', '.join(unknown)} "
+            f"(choose from {', '.join(EXTRA_DEPENDENCIES)}, all)"
+        )
+    return extras
+
 def check_api_key():
     """Check if OpenRouter API key is set."""
     if "OPENROUTER_API_KEY" in os.environ:
@@ -44,9 +83,22 @@ def check_api_key():
         print("Example: export OPENROUTER_API_KEY=your_api_key_here")
 
 if __name__ == "__main__":
-    install_dependencies()
+    parser = argparse.ArgumentParser(description="Install dependencies for the OpenRouter chatbot")
+    parser.add_argument(
+        "--with", dest="extras", type=parse_extras, default=[],
+        help=f"Comma-separated optional groups to install: {', '.join(EXTRA_DEPENDENCIES)}, or all"
+    )
+    args = parser.parse_args()
+    
+    install_dependencies(args.extras)
     check_api_key()
     
-    print("\nSetup complete! You can now run the chatbot application.")
-    print("To test the rule-based router, run:")
-    print("  python rule_based_router_demo.py") 
\ No newline at end of file
+    missing = [extra for extra in APP_EXTRAS if extra not in args.extras]
+    if missing:
+        print("\nCore setup complete. The chatbot and routers also need the "
+              f"{', '.join(missing)} group(s); install them with:")
+        print(f"  python install_dependencies.py --with {','.join(APP_EXTRAS)}")
+    else:
+        print("\nSetup complete! You can now run the chatbot application.")
+        print("To test the rule-based router, run:")
+        print("  python rule_based_router_demo.py") 
\ No newline at end of file
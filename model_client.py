@@ -1,17 +1,127 @@
 import os
 import json
+import time
+import uuid
+import asyncio
+import threading
+import importlib.util
 import requests
-from typing import Dict, List, Any, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import Dict, List, Any, Optional, Iterator, Union
+import queue
+import atexit
 import logging
+import logging.handlers
 from datetime import datetime
 
-# Set up logging
-logging.basicConfig(
-    filename=os.path.join("logs", f"api_calls_{datetime.now().strftime('%Y%m%d')}.log"),
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    filemode='a'
-)
+try:
+    # orjson (de)serializes payloads and log entries several times faster than the stdlib
+    import orjson
+    
+    def _dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode()
+    
+    _dump_bytes = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(obj: Any) -> str:
+        return json.dumps(obj)
+    
+    def _dump_bytes(obj: Any) -> bytes:
+        return json.dumps(obj).encode("utf-8")
+    
+    _loads = json.loads
+
+# API call logging is off until configure_file_logging() is called
+logger = logging.getLogger(__name__)
+_log_listener = None
+
+def configure_file_logging(log_dir: str = "logs") -> None:
+    """
+    Write API call logs to <log_dir>/api_calls_YYYYMMDD.log
+    
+    Records are handed to a queue and written by a background listener
+    thread, so logging an API call never waits on disk I/O. Safe to call more
+    than once; only the first call sets up the handlers.
+    
+    Args:
+        log_dir: Directory for the log file, created if missing
+    """
+    global _log_listener
+    if _log_listener is not None:
+        return
+    
+    os.makedirs(log_dir, exist_ok=True)
+    file_handler = logging.FileHandler(
+        os.path.join(log_dir, f"api_calls_{datetime.now().strftime('%Y%m%d')}.log"),
+        mode='a'
+    )
+    file_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+    
+    log_queue = queue.Queue(-1)
+    _log_listener = logging.handlers.QueueListener(log_queue, file_handler, respect_handler_level=True)
+    _log_listener.start()
+    atexit.register(_log_listener.stop)
+    
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+
+# How long a fetched model list is reused before asking OpenRouter again (seconds)
+MODELS_CACHE_TTL = 300
+
+# HTTP/2 for the async client needs the optional h2 package
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+class RateLimitRetry(Retry):
+    """Retry policy that also honours OpenRouter's X-RateLimit-Reset header on 429s"""
+    
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is not None or response.status != 429:
+            return retry_after
+        
+        # X-RateLimit-Reset is the reset time as a Unix timestamp in milliseconds
+        reset = response.headers.get("X-RateLimit-Reset")
+        try:
+            return max(0.0, int(reset) / 1000 - time.time())
+        except (TypeError, ValueError):
+            return None
+
+def build_retry(total: int = 5) -> Retry:
+    """
+    Build the retry policy for OpenRouter calls
+    
+    Retries connection errors and 408/429/5xx responses with exponential
+    backoff plus jitter, waiting for Retry-After when the server sends it.
+    """
+    options = dict(
+        total=total,
+        backoff_factor=0.5,
+        status_forcelist=(408, 429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "POST"]),
+        respect_retry_after_header=True
+    )
+    try:
+        return RateLimitRetry(backoff_jitter=0.3, **options)
+    except TypeError:
+        # urllib3 < 2 has no backoff_jitter
+        return RateLimitRetry(**options)
+
+def idempotency_headers() -> Dict[str, str]:
+    """
+    Headers that let the gateway de-duplicate a POST that is retried
+    
+    The key is unique per call and travels with every retry of that call, so
+    a retried completion whose first response was lost is not billed twice,
+    while a deliberate repeat of the same prompt still gets a fresh answer.
+    """
+    return {"Idempotency-Key": uuid.uuid4().hex}
+
+def completion_headers() -> Dict[str, str]:
+    """Per-request headers for a chat completion POST with a pre-encoded JSON body"""
+    return {"Content-Type": "application/json", **idempotency_headers()}
 
 class ModelClient:
     """Base class for LLM API clients"""
@@ -43,10 +153,15 @@ class ModelClient:
             messages: The messages sent
             response: The response received
         """
+        # Skip building the entry entirely when INFO is filtered out
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        
         try:
             # Create log entry
-            prompt_tokens = response.get("usage", {}).get("prompt_tokens", 0)
-            completion_tokens = response.get("usage", {}).get("completion_tokens", 0)
+            usage = response.get("usage") or {}
+            prompt_tokens = usage.get("prompt_tokens", 0)
+            completion_tokens = usage.get("completion_tokens", 0)
             
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
@@ -58,16 +173,28 @@ class ModelClient:
             }
             
             # Log to file
-            logging.info(json.dumps(log_entry))
+            logger.info("%s", _dumps(log_entry))
             
         except Exception as e:
-            logging.error(f"Error logging API call: {str(e)}")
+            logger.error("Error logging API call: %s", e)
 
 
 class OpenRouterClient(ModelClient):
     """Client for the OpenRouter API"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, max_connections: int = 64, warm_up: bool = False):
+        """
+        Initialize the OpenRouter client
+        
+        Args:
+            api_key: OpenRouter API key (defaults to OPENROUTER_API_KEY)
+            max_connections: Connections kept per pool, i.e. how many calls can be
+                in flight at once before callers wait. Under HTTP/2 (async client)
+                one connection carries many concurrent requests, so this can stay
+                well below the expected concurrency there.
+            warm_up: Open a connection right away so the first real call skips
+                the TCP/TLS handshake
+        """
         super().__init__(api_key)
         self.api_key = api_key or os.getenv("OPENROUTER_API_KEY")
         if not self.api_key:
@@ -75,11 +202,47 @@ class OpenRouterClient(ModelClient):
         
         self.api_url = "https://openrouter.ai/api/v1/chat/completions"
         self.headers = {
-            "Content-Type": "application/json",
             "Authorization": f"Bearer {self.api_key}",
             "HTTP-Referer": "https://multi-llm-chatbot.streamlit.app",  # Replace with your actual domain when deployed
             "X-Title": "Multi-LLM Chat with OpenRouter"
         }
+        
+        # One pooled session so repeated calls reuse keep-alive TCP/TLS connections;
+        # transient failures (timeouts, 429s, 5xx) are retried with backoff
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.max_connections = max_connections
+        self.session.mount("https://", HTTPAdapter(
+            pool_connections=16,
+            pool_maxsize=max_connections,
+            pool_block=False,
+            max_retries=build_retry()
+        ))
+        
+        # Async client for concurrent calls, created on first use (requires httpx);
+        # an httpx.AsyncClient is bound to the event loop it first ran on
+        self._aclient = None
+        self._aclient_loop = None
+        
+        # Last successful model list and when it was fetched (time.monotonic)
+        self._models_cache = (None, 0.0)
+        self._models_lock = threading.Lock()
+        
+        if warm_up:
+            self.warm_up()
+    
+    def warm_up(self) -> bool:
+        """
+        Open a pooled connection to OpenRouter ahead of the first real call
+        
+        Returns:
+            True if the connection was established
+        """
+        try:
+            self.session.head("https://openrouter.ai/api/v1/models", timeout=10)
+            return True
+        except requests.exceptions.RequestException:
+            return False
 
     def generate_response(self, messages: List[Dict[str, str]], model: str, 
                           temperature: float = 0.7, max_tokens: int = 1000,
@@ -106,39 +269,199 @@ class OpenRouterClient(ModelClient):
         }
         
         try:
-            response = requests.post(
+            response = self.session.post(
                 self.api_url,
-                headers=self.headers,
-                data=json.dumps(payload),
+                data=_dump_bytes(payload),
+                headers=completion_headers(),
                 timeout=60
             )
             response.raise_for_status()
-            response_data = response.json()
+            response_data = _loads(response.content)
             
             # Log the request
             self._log_request(model, messages, response_data)
             
             return response_data
             
-        except requests.exceptions.RequestException as e:
+        except (requests.exceptions.RequestException, ValueError) as e:
+            # ValueError covers a 200 response whose body is not valid JSON
             error_response = {"error": str(e)}
             self._log_request(model, messages, error_response)
             return error_response
             
-    def list_available_models(self) -> List[Dict[str, Any]]:
+    def stream_response(self, messages: List[Dict[str, str]], model: str,
+                        temperature: float = 0.7, max_tokens: int = 1000,
+                        **kwargs) -> Iterator[Union[str, Dict[str, Any]]]:
         """
-        Get list of available models from OpenRouter
+        Stream a response from a specified model via OpenRouter
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            model: The model identifier to use
+            temperature: Controls randomness (0-1)
+            max_tokens: Maximum number of tokens to generate
+            **kwargs: Additional parameters to pass to the API
+            
+        Yields:
+            Text chunks (str) as they arrive, then a final dictionary with the
+            "model" and "usage" of the response (or {"error": ...} on failure)
+        """
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True,
+            "usage": {"include": True},
+            **kwargs
+        }
+        
+        response_data = {"model": model, "usage": {}}
+        try:
+            with self.session.post(
+                self.api_url,
+                data=_dump_bytes(payload),
+                headers=completion_headers(),
+                timeout=60,
+                stream=True
+            ) as response:
+                response.raise_for_status()
+                
+                # Server-sent events: "data: {...}" lines, ending with "data: [DONE]"
+                response.encoding = "utf-8"
+                for line in response.iter_lines(decode_unicode=True):
+                    if not line or not line.startswith("data: "):
+                        continue
+                    data = line[len("data: "):]
+                    if data == "[DONE]":
+                        break
+                    
+                    chunk = _loads(data)
+                    if "error" in chunk:
+                        response_data = {"error": _dumps(chunk["error"])}
+                        break
+                    
+                    response_data["model"] = chunk.get("model", response_data["model"])
+                    if chunk.get("usage"):
+                        response_data["usage"] = chunk["usage"]
+                    
+                    choices = chunk.get("choices") or [{}]
+                    text = choices[0].get("delta", {}).get("content")
+                    if text:
+                        yield text
+                        
+        except (requests.exceptions.RequestException, ValueError) as e:
+            response_data = {"error": str(e)}
+        
+        # Log the request
+        self._log_request(model, messages, response_data)
+        
+        yield response_data
+    
+    async def agenerate_response(self, messages: List[Dict[str, str]], model: str,
+                                 temperature: float = 0.7, max_tokens: int = 1000,
+                                 **kwargs) -> Dict[str, Any]:
+        """
+        Async version of generate_response for issuing many calls concurrently
         
+        Calls within one event loop share a pooled httpx.AsyncClient; a call
+        from a different loop (e.g. a second asyncio.run) gets a fresh client,
+        since the old one's connections belong to the previous loop. Await
+        aclose() before a loop ends to close its connections. With h2 installed
+        (``pip install "httpx[http2]"``) concurrent calls are multiplexed over a
+        single HTTP/2 connection, so N calls awaited together with
+        asyncio.gather take roughly as long as the slowest one.
+        
+        Args:
+            messages: List of message dictionaries with 'role' and 'content' keys
+            model: The model identifier to use
+            temperature: Controls randomness (0-1)
+            max_tokens: Maximum number of tokens to generate
+            **kwargs: Additional parameters to pass to the API
+            
         Returns:
-            List of model information dictionaries
+            Response from the API as a dictionary
         """
         try:
-            response = requests.get(
-                "https://openrouter.ai/api/v1/models",
+            import httpx
+        except ImportError:
+            raise ImportError("agenerate_response requires httpx. Install it with: pip install httpx")
+        
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            self._aclient_loop = loop
+            self._aclient = httpx.AsyncClient(
+                http2=HTTP2_AVAILABLE,
                 headers=self.headers,
-                timeout=30
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=max(1, self.max_connections // 2)
+                ),
+                timeout=60
+            )
+        
+        payload = {
+            "model": model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            **kwargs
+        }
+        
+        try:
+            response = await self._aclient.post(
+                self.api_url,
+                content=_dump_bytes(payload),
+                headers=completion_headers()
             )
             response.raise_for_status()
-            return response.json().get("data", [])
-        except requests.exceptions.RequestException as e:
-            return [{"error": str(e)}] 
\ No newline at end of file
+            response_data = _loads(response.content)
+            
+            # Log the request
+            self._log_request(model, messages, response_data)
+            
+            return response_data
+            
+        except (httpx.HTTPError, ValueError) as e:
+            error_response = {"error": str(e)}
+            self._log_request(model, messages, error_response)
+            return error_response
+            
+    def list_available_models(self) -> List[Dict[str, Any]]:
+        """
+        Get list of available models from OpenRouter
+        
+        Successful results are reused for MODELS_CACHE_TTL seconds.
+        
+        Returns:
+            List of model information dictionaries
+        """
+        with self._models_lock:
+            cached, fetched_at = self._models_cache
+            if cached is not None and time.monotonic() - fetched_at < MODELS_CACHE_TTL:
+                # A copy, so callers can sort or filter without touching the cache
+                return list(cached)
+            
+            try:
+                response = self.session.get(
+                    "https://openrouter.ai/api/v1/models",
+                    timeout=30
+                )
+                response.raise_for_status()
+                models = _loads(response.content).get("data", [])
+            except (requests.exceptions.RequestException, ValueError) as e:
+                return [{"error": str(e)}]
+            
+            self._models_cache = (models, time.monotonic())
+            return list(models)
+    
+    def close(self) -> None:
+        """Close the underlying HTTP session and its pooled connections"""
+        self.session.close()
+    
+    async def aclose(self) -> None:
+        """Close the async HTTP client, if one was created in the running event loop"""
+        if self._aclient is not None and self._aclient_loop is asyncio.get_running_loop():
+            await self._aclient.aclose()
+        self._aclient = None
+        self._aclient_loop = None
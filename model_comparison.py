@@ -17,8 +17,10 @@ import plotly.express as px
 from datetime import datetime
 from typing import Dict, List, Any, Optional, Tuple
 
-# Add the src directory to the path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Add the project root to the path (once; Streamlit re-executes this script on every rerun)
+PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
 # Import the rule-based router and other utilities
 try:
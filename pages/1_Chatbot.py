@@ -7,19 +7,19 @@ A chat interface with rule-based routing to select the most appropriate model ba
 
 import os
 import sys
-import yaml
 import time
 import streamlit as st
-from datetime import datetime
-import copy
+from itertools import chain
 
-# Add the src directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the project root to the path (once; Streamlit re-executes this script on every rerun)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
 # Import the rule-based router and other utilities
 try:
+    from src.config.config_loader import load_config as load_yaml_config
     from src.utils.rule_based_router import RuleBasedRouter
-    from src.utils.cost_tracker import CostTracker
 except ImportError as e:
     st.error(f"Error importing required modules: {e}")
     st.info("Make sure all dependencies are installed and the project structure is correct.")
@@ -34,89 +34,8 @@ st.set_page_config(
 )
 
 # Custom styles
-st.markdown("""
+CUSTOM_CSS = """
 <style>
-    .model-tag {
-        font-size: 0.8em;
-        color: #888;
-        margin-bottom: 0px;
-    }
-    .metrics-container {
-        background-color: #f0f2f6;
-        border-radius: 5px;
-        padding: 10px;
-        margin-bottom: 10px;
-        border-left: 3px solid #4CAF50;
-    }
-    .chat-container {
-        margin-bottom: 20px;
-    }
-    .user-message {
-        background-color: #e6f7ff;
-        padding: 10px;
-        border-radius: 10px;
-        margin-bottom: 10px;
-        border-left: 3px solid #1E88E5;
-        position: relative;
-    }
-    .assistant-message {
-        background-color: #f0f0f0;
-        padding: 10px;
-        border-radius: 10px;
-        margin-bottom: 10px;
-        border-left: 3px solid #7E57C2;
-    }
-    .small-text {
-        font-size: 0.8em;
-    }
-    .token-usage {
-        display: inline-block;
-        margin-right: 10px;
-    }
-    .cost {
-        display: inline-block;
-        margin-right: 10px;
-        color: #4CAF50;
-    }
-    .latency {
-        display: inline-block;
-        color: #FF9800;
-    }
-    .rerun-button {
-        position: absolute;
-        top: 5px;
-        right: 5px;
-        font-size: 0.8em;
-        padding: 2px 8px;
-        background-color: #f0f0f0;
-        border-radius: 12px;
-        color: #555;
-        border: 1px solid #ddd;
-        cursor: pointer;
-    }
-    .rerun-button:hover {
-        background-color: #e0e0e0;
-    }
-    .rerun-message {
-        background-color: #fff8e1;
-        padding: 10px;
-        border-radius: 10px;
-        margin-bottom: 10px;
-        border-left: 3px solid #FFC107;
-    }
-    .rerun-tag {
-        display: inline-block;
-        background-color: #fff0c2;
-        color: #9a7b00;
-        padding: 2px 6px;
-        border-radius: 12px;
-        font-size: 0.7em;
-        margin-right: 5px;
-    }
-    .model-dropdown {
-        margin-bottom: 10px;
-    }
-    /* New styles for routing explanations */
     .routing-explanation {
         background-color: #f5f5f5;
         border-radius: 5px;
@@ -126,70 +45,94 @@ st.markdown("""
         border-left: 3px solid #9575CD;
         font-size: 0.9em;
     }
-    .routing-tag {
-        display: inline-block;
-        background-color: #e8eaf6;
-        color: #5c6bc0;
-        padding: 2px 6px;
-        border-radius: 12px;
-        font-size: 0.8em;
-        margin-right: 5px;
-    }
-    .strategy-balanced {
-        color: #5c6bc0;
-    }
-    .strategy-cost {
-        color: #43a047;
-    }
-    .strategy-speed {
-        color: #fb8c00;
-    }
-    .strategy-quality {
-        color: #ec407a;
-    }
-    /* Strategy badge styling */
-    .strategy-badge {
-        display: inline-block;
-        padding: 3px 8px;
-        border-radius: 12px;
-        font-size: 0.75em;
-        font-weight: bold;
-        margin-left: 5px;
-    }
-    .badge-balanced {
-        background-color: #e8eaf6;
-        color: #3949ab;
-    }
-    .badge-cost {
-        background-color: #e8f5e9;
-        color: #2e7d32;
-    }
-    .badge-speed {
-        background-color: #fff3e0;
-        color: #ef6c00;
-    }
-    .badge-quality {
-        background-color: #fce4ec;
-        color: #c2185b;
-    }
 </style>
-""", unsafe_allow_html=True)
+"""
+# Collapse whitespace once so each rerun sends the smallest possible payload
+CUSTOM_CSS = " ".join(CUSTOM_CSS.split())
+
+# Per-response metrics line shown under each assistant message
+METRICS_CAPTION = (
+    "Model: {model}{strategy} | Tokens: {prompt_tokens} (prompt) + {completion_tokens} (completion) = {tokens}"
+    " | Cost: ${cost:.6f} | Latency: {latency:.2f}s"
+)
+
+# Fields every stored metrics record is guaranteed to have
+METRIC_DEFAULTS = {
+    "model": "Unknown",
+    "prompt_tokens": 0,
+    "completion_tokens": 0,
+    "token_count": 0,
+    "cost": 0.0,
+    "latency": 0.0,
+    "routing_explanation": None
+}
+
+# Session state keys and factories for their initial values (called per session,
+# so mutable defaults are never shared between sessions)
+SESSION_DEFAULTS = {
+    "messages": list,
+    "metrics": list,
+    # Metrics keyed by the index of the assistant message they belong to
+    "metrics_by_index": dict,
+    "conversation_cost": float,
+    # Running token totals and per-model stats, updated as metrics are recorded
+    "running_totals": lambda: {"prompt": 0, "completion": 0, "total": 0},
+    "model_stats": dict,
+    "show_metrics": lambda: True,
+    "manual_model_selection": lambda: False,
+    "selected_model": lambda: None,
+    "rerun_message_index": lambda: None,
+    "rerun_model": lambda: None,
+    "rerun_responses": dict,
+    # Reverse of rerun_responses: response message index -> model that produced it
+    "rerun_index": dict,
+    "routing_strategy": lambda: "balanced",
+    "show_routing_explanation": lambda: True
+}
+
+# Number of most recent messages rendered on each rerun
+HISTORY_WINDOW = 20
+
+# Streamed text is pushed to the page every this many chunks, or after this many seconds
+STREAM_FLUSH_CHUNKS = 8
+STREAM_FLUSH_INTERVAL = 0.05
+
+def config_mtime():
+    """Modification time of config.yaml (0.0 if it cannot be read)"""
+    try:
+        return os.path.getmtime("config.yaml")
+    except OSError:
+        return 0.0
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_config_file(mtime):
+    """
+    Parse config.yaml; cached per modification time, so edits are picked up
+    
+    config_loader parses with libyaml's CSafeLoader when available and keeps a
+    pickle sidecar, so new processes skip YAML parsing entirely.
+    """
+    return load_yaml_config("config.yaml")
 
-@st.cache_resource
 def load_config():
-    """Load configuration from config.yaml"""
+    """Load configuration from config.yaml (each caller gets its own copy)"""
     try:
-        with open("config.yaml", "r") as f:
-            return yaml.safe_load(f)
+        return _load_config_file(config_mtime())
     except Exception as e:
         st.error(f"Error loading configuration: {e}")
         return {}
 
-@st.cache_resource
-def initialize_router(config):
-    """Initialize the router with the configuration"""
+@st.cache_resource(max_entries=2)
+def initialize_router(_config, mtime):
+    """
+    Initialize the router with the configuration
+    
+    The config argument is not hashed (leading underscore); the router is
+    keyed on the config file's modification time instead, so one router is
+    shared by every session and rerun until config.yaml changes.
+    """
     try:
-        router = RuleBasedRouter(config)
+        router = RuleBasedRouter(_config)
         return router
     except Exception as e:
         st.error(f"Error initializing router: {e}")
@@ -197,259 +140,243 @@ def initialize_router(config):
 
 def initialize_session_state():
     """Initialize session state variables"""
-    if "messages" not in st.session_state:
-        st.session_state.messages = []
-    
-    if "metrics" not in st.session_state:
-        st.session_state.metrics = []
-    
-    if "conversation_cost" not in st.session_state:
-        st.session_state.conversation_cost = 0.0
-    
-    if "show_metrics" not in st.session_state:
-        st.session_state.show_metrics = True
-    
-    if "manual_model_selection" not in st.session_state:
-        st.session_state.manual_model_selection = False
-    
-    if "selected_model" not in st.session_state:
-        st.session_state.selected_model = None
-        
-    if "rerun_message_index" not in st.session_state:
-        st.session_state.rerun_message_index = None
-        
-    if "rerun_model" not in st.session_state:
-        st.session_state.rerun_model = None
-        
-    if "rerun_responses" not in st.session_state:
-        st.session_state.rerun_responses = {}
-        
-    if "routing_strategy" not in st.session_state:
-        st.session_state.routing_strategy = "balanced"
-        
-    if "show_routing_explanation" not in st.session_state:
-        st.session_state.show_routing_explanation = True
+    for key, factory in SESSION_DEFAULTS.items():
+        if key not in st.session_state:
+            st.session_state[key] = factory()
+    
+    # API-ready history: the system prompt followed by every chat message
+    if "full_messages" not in st.session_state:
+        st.session_state.full_messages = [{"role": "system", "content": ""}] + st.session_state.messages
+    
+    # Indices of user messages, appended as prompts arrive
+    if "user_indices" not in st.session_state:
+        st.session_state.user_indices = [
+            i for i, m in enumerate(st.session_state.messages) if m["role"] == "user"
+        ]
+
+@st.cache_data(show_spinner=False)
+def get_model_names(models):
+    """Map model IDs (sorted) to display names (cached, recomputed only when models change)"""
+    return {model_id: models[model_id].get("name", model_id) for model_id in sorted(models)}
+
+@st.cache_data(show_spinner=False)
+def get_model_labels(models):
+    """Map model IDs (sorted) to "Name (id)" dropdown labels (cached)"""
+    return {model_id: f"{name} ({model_id})" for model_id, name in get_model_names(models).items()}
+
+def system_message():
+    """The system message for the current prompt (rebuilt only when the prompt changes)"""
+    cached = st.session_state.get("system_message")
+    if cached is None or cached["content"] != st.session_state.system_prompt:
+        cached = {"role": "system", "content": st.session_state.system_prompt}
+        st.session_state.system_message = cached
+    return cached
+
+def select_rerun_message(message_index):
+    """Button callback: open the model picker under the given user message"""
+    st.session_state.rerun_message_index = message_index
+
+def _metrics_caption(model, strategy, prompt_tokens, completion_tokens, tokens, cost, latency):
+    """Format one response's metrics line"""
+    return METRICS_CAPTION.format(
+        model=model,
+        strategy=f" ({strategy.capitalize()})" if strategy else "",
+        prompt_tokens=prompt_tokens,
+        completion_tokens=completion_tokens,
+        tokens=tokens,
+        cost=cost,
+        latency=latency
+    )
+
+def _explanation_html(explanation_text):
+    """Wrap a routing explanation in its styled div"""
+    formatted_explanation = explanation_text.replace("\n", "<br>")
+    return f'<div class="routing-explanation">{formatted_explanation}</div>'
 
 def display_chat_messages(config, router):
-    """Display chat messages from history"""
-    if not st.session_state.messages:
+    """Display chat messages from history, rendering only the most recent ones by default"""
+    messages = st.session_state.messages
+    if not messages:
         # Welcome message
         st.info("👋 Welcome to the OpenRouter Chatbot! Send a message to get started.")
         return
     
-    # Get available models for rerun dropdowns
-    available_models = sorted(config.get("models", {}).keys())
+    # Model names and dropdown labels for rerun controls
+    models_cfg = config.get("models", {})
+    model_names = get_model_names(models_cfg)
+    model_labels = get_model_labels(models_cfg)
     
-    # Display all messages
-    message_containers = []
+    # Older messages are only rendered on request, keeping each rerun O(window)
+    start = max(0, len(messages) - HISTORY_WINDOW)
+    if start and st.toggle("Show earlier messages", key="show_earlier_messages", help=f"{start} older messages are hidden"):
+        for i in range(start):
+            display_message(i, messages[i], model_names, model_labels)
     
-    for i, message in enumerate(st.session_state.messages):
-        role = message["role"]
-        content = message["content"]
-        
-        if role == "user":
-            # Create unique keys for this message's components
-            rerun_button_key = f"rerun_button_{i}"
-            message_container = st.container()
-            message_containers.append(message_container)
+    for i in range(start, len(messages)):
+        display_message(i, messages[i], model_names, model_labels)
+
+def display_message(i, message, model_names, model_labels):
+    """Display one chat message with its rerun controls, metrics and routing explanation"""
+    role = message["role"]
+    content = message["content"]
+    
+    if role == "user":
+        with st.container():
+            # Display user message with a rerun button
+            with st.chat_message("user"):
+                st.markdown(content)
+            st.button(
+                "Try with different model",
+                key=f"rerun_{i}",
+                on_click=select_rerun_message,
+                args=(i,)
+            )
             
-            with message_container:
-                # Display user message with a rerun button
-                st.markdown(
-                    f'<div class="user-message">{content}'
-                    f'<button class="rerun-button" id="{rerun_button_key}">Try with different model</button>'
-                    f'</div>', 
-                    unsafe_allow_html=True
+            # Check if this message is selected for rerun
+            if st.session_state.rerun_message_index == i:
+                st.markdown("#### Try with a different model")
+                
+                # Model selection dropdown
+                selected_model = st.selectbox(
+                    "Select model to try",
+                    options=list(model_labels),
+                    format_func=model_labels.__getitem__,
+                    key=f"rerun_model_select_{i}"
                 )
                 
-                # Javascript to handle button click
-                st.markdown(f"""
-                <script>
-                    document.getElementById("{rerun_button_key}").addEventListener("click", function() {{
-                        window.parent.postMessage({{
-                            type: "streamlit:setComponentValue",
-                            value: {i},
-                            dataType: "json",
-                            key: "rerun_message_index"
-                        }}, "*");
-                    }});
-                </script>
-                """, unsafe_allow_html=True)
+                # Rerun button
+                col1, col2 = st.columns([1, 5])
+                with col1:
+                    if st.button("Run with this model", key=f"execute_rerun_{i}"):
+                        # Store the selected model; main streams the rerun below the history
+                        st.session_state.rerun_model = selected_model
                 
-                # Check if this message is selected for rerun
-                if st.session_state.rerun_message_index == i:
-                    st.markdown("#### Try with a different model")
-                    
-                    # Model selection dropdown
-                    selected_model = st.selectbox(
-                        "Select model to try",
-                        options=available_models,
-                        format_func=lambda x: f"{config.get('models', {}).get(x, {}).get('name', x)} ({x})",
-                        key=f"rerun_model_select_{i}"
-                    )
-                    
-                    # Rerun button
-                    col1, col2 = st.columns([1, 5])
-                    with col1:
-                        if st.button("Run with this model", key=f"execute_rerun_{i}"):
-                            # Store the selected model and trigger rerun
-                            st.session_state.rerun_model = selected_model
-                            
-                            # Get the message and all previous messages to maintain context
-                            messages_context = []
-                            for j in range(0, i+1):
-                                if st.session_state.messages[j]["role"] == "user":
-                                    messages_context.append(st.session_state.messages[j])
-                            
-                            # Execute rerun
-                            execute_rerun(router, messages_context, i)
-                    
-                    with col2:
-                        if st.button("Cancel", key=f"cancel_rerun_{i}"):
-                            st.session_state.rerun_message_index = None
-                            st.rerun()
-        else:
-            # This is an assistant message
-            # Check if it's a rerun response
-            is_rerun = False
-            rerun_model = None
-            
-            # Find if this is a response to a rerun
-            for msg_idx, responses in st.session_state.rerun_responses.items():
-                if i == msg_idx + 1:  # This is the original response
-                    continue
-                    
-                for model_id, response_idx in responses.items():
-                    if i == response_idx:
-                        is_rerun = True
-                        rerun_model = model_id
-                        break
+                with col2:
+                    if st.button("Cancel", key=f"cancel_rerun_{i}"):
+                        st.session_state.rerun_message_index = None
+                        st.rerun()
+    else:
+        # This is an assistant message
+        # Check if it's a rerun response
+        rerun_model = st.session_state.rerun_index.get(i)
+        is_rerun = rerun_model is not None
+        
+        with st.chat_message("assistant"):
+            if is_rerun:
+                # Label the rerun message with its model
+                model_name = model_names.get(rerun_model, rerun_model)
+                st.caption(f"Alternative response using {model_name}")
             
-            if is_rerun and rerun_model:
-                # Display rerun message with model info
-                model_name = config.get("models", {}).get(rerun_model, {}).get("name", rerun_model)
-                
-                st.markdown(
-                    f'<div class="rerun-message">'
-                    f'<span class="rerun-tag">Alternative response using {model_name}</span>'
-                    f'{content}'
-                    f'</div>', 
-                    unsafe_allow_html=True
-                )
-            else:
-                # Display regular assistant message
-                st.markdown(f'<div class="assistant-message">{content}</div>', unsafe_allow_html=True)
+            st.markdown(content)
             
             # Show metrics for this assistant message if available
-            message_index = i // 2
-            if st.session_state.show_metrics and message_index < len(st.session_state.metrics):
-                metrics = st.session_state.metrics[message_index]
-                
-                # Format metrics
-                model = metrics.get("model", "Unknown model")
-                tokens = metrics.get("token_count", 0)
-                prompt_tokens = metrics.get("prompt_tokens", 0)
-                completion_tokens = metrics.get("completion_tokens", 0)
-                latency = metrics.get("latency", 0)
-                cost = metrics.get("cost", 0)
-                
+            metrics = st.session_state.metrics_by_index.get(i) if st.session_state.show_metrics else None
+            if metrics:
                 # Get routing explanation if available
-                routing_explanation = metrics.get("routing_explanation", None)
+                routing_explanation = metrics["routing_explanation"]
                 strategy = routing_explanation.get("strategy", "balanced") if routing_explanation else "balanced"
+                show_strategy = not is_rerun and not st.session_state.manual_model_selection
                 
-                # Create strategy badge
-                strategy_badge = f'<span class="strategy-badge badge-{strategy}">{strategy.capitalize()}</span>'
-                
-                # Create HTML for metrics
-                metrics_html = f"""
-                <div class="metrics-container">
-                    <div class="model-tag">Model: {model} {strategy_badge if not is_rerun and not st.session_state.manual_model_selection else ""}</div>
-                    <div class="token-usage">Tokens: {prompt_tokens} (prompt) + {completion_tokens} (completion) = {tokens}</div>
-                    <div class="cost">Cost: ${cost:.6f}</div>
-                    <div class="latency">Latency: {latency:.2f}s</div>
-                </div>
-                """
-                
-                # Display metrics
-                st.markdown(metrics_html, unsafe_allow_html=True)
-                
-                # Show routing explanation if available and enabled
-                if st.session_state.show_routing_explanation and not is_rerun and not st.session_state.manual_model_selection:
-                    if routing_explanation:
-                        explanation_text = routing_explanation.get("explanation", "No explanation available.")
+                # One caption line per response
+                st.caption(_metrics_caption(
+                    metrics["model"],
+                    strategy if show_strategy else None,
+                    metrics["prompt_tokens"],
+                    metrics["completion_tokens"],
+                    metrics["token_count"],
+                    metrics["cost"],
+                    metrics["latency"]
+                ))
+        
+        if metrics:
+            # Show routing explanation if available and enabled
+            if st.session_state.show_routing_explanation and not is_rerun and not st.session_state.manual_model_selection:
+                if routing_explanation:
+                    explanation_text = routing_explanation.get("explanation", "No explanation available.")
+                    
+                    # Create expandable section for routing explanation
+                    with st.expander("Why was this model selected?", expanded=False):
+                        # Display the formatted explanation
+                        st.markdown(_explanation_html(explanation_text), unsafe_allow_html=True)
                         
-                        # Create expandable section for routing explanation
-                        with st.expander("Why was this model selected?", expanded=False):
-                            # Format explanation text with appropriate styling
-                            formatted_explanation = explanation_text.replace("\n", "<br>")
-                            
-                            # Display the formatted explanation
-                            st.markdown(f'<div class="routing-explanation">{formatted_explanation}</div>', unsafe_allow_html=True)
-                            
-                            # Add additional information about matched patterns if available
-                            matched_patterns = routing_explanation.get("matched_patterns", {})
-                            if matched_patterns:
-                                st.markdown("#### Pattern Matches")
-                                pattern_data = {
-                                    "Category": list(matched_patterns.keys()),
-                                    "Matches": list(matched_patterns.values())
-                                }
-                                st.dataframe(pattern_data, use_container_width=True)
-
-def execute_rerun(router, messages_context, user_msg_index):
-    """Execute a rerun of a user message with a different model"""
+                        # Add additional information about matched patterns if available
+                        matched_patterns = routing_explanation.get("matched_patterns", {})
+                        if matched_patterns:
+                            st.markdown("#### Pattern Matches")
+                            pattern_data = {
+                                "Category": list(matched_patterns.keys()),
+                                "Matches": list(matched_patterns.values())
+                            }
+                            st.dataframe(pattern_data, use_container_width=True)
+
+def stream_to_placeholder(stream, placeholder):
+    """
+    Render a router response stream into a placeholder
+    
+    Chunks are collected in a list and joined only when the placeholder is
+    redrawn, which happens every STREAM_FLUSH_CHUNKS chunks or
+    STREAM_FLUSH_INTERVAL seconds rather than on every chunk.
+    
+    Returns:
+        Tuple of (response_text, metrics), where metrics is the stream's final dict
+    """
+    chunks = []
+    metrics = {}
+    unrendered = 0
+    last_render = time.monotonic()
+    
+    for item in stream:
+        if isinstance(item, dict):
+            metrics = item
+            continue
+        
+        chunks.append(item)
+        unrendered += 1
+        now = time.monotonic()
+        if unrendered >= STREAM_FLUSH_CHUNKS or now - last_render >= STREAM_FLUSH_INTERVAL:
+            placeholder.markdown("".join(chunks))
+            unrendered = 0
+            last_render = now
+    
+    response_text = "".join(chunks)
+    if unrendered:
+        placeholder.markdown(response_text)
+    
+    return response_text, metrics
+
+def execute_rerun(router, user_msg_index, config):
+    """
+    Execute a rerun of a user message with a different model
+    
+    The alternative response streams into a new assistant message at the end
+    of the history, where it will be stored, and the page is then rerun so it
+    is drawn with the rest of the history.
+    """
     if not st.session_state.rerun_model:
         st.error("No model selected for rerun.")
         return
     
-    # System prompt needs to be included
-    full_messages = [
-        {"role": "system", "content": st.session_state.system_prompt}
-    ] + messages_context
+    # The system prompt, then the message and all previous prompts, to maintain context
+    messages = st.session_state.messages
+    full_messages = list(chain(
+        (system_message(),),
+        (messages[j] for j in st.session_state.user_indices if j <= user_msg_index)
+    ))
     
-    # Get the user message that we're rerunning
-    user_message = messages_context[-1]["content"]
+    rerun_model = st.session_state.rerun_model
+    model_name = get_model_names(config.get("models", {})).get(rerun_model, rerun_model)
     
-    with st.spinner(f"Getting response from {st.session_state.rerun_model}..."):
+    with st.chat_message("assistant"):
+        st.caption(f"Alternative response using {model_name}")
+        response_placeholder = st.empty()
+        
         try:
-            # Get response from the selected model
-            start_time = time.time()
-            response_text, metrics = router.send_prompt(
-                full_messages, 
-                model_id=st.session_state.rerun_model
-            )
-            total_time = time.time() - start_time
-            
-            # Calculate and add cost
-            model = metrics.get("model", "unknown")
-            tokens = metrics.get("token_count", 0)
-            cost = router.calculate_cost(tokens, model)
-            
-            # Add cost to metrics
-            metrics["cost"] = cost
-            
-            # Update total conversation cost
-            st.session_state.conversation_cost += cost
-            
-            # Add assistant message to chat at the end
-            st.session_state.messages.append({"role": "assistant", "content": response_text})
-            
-            # Store metrics
-            st.session_state.metrics.append(metrics)
-            
-            # Add to rerun responses mapping
-            if user_msg_index not in st.session_state.rerun_responses:
-                st.session_state.rerun_responses[user_msg_index] = {}
-                
-            st.session_state.rerun_responses[user_msg_index][st.session_state.rerun_model] = len(st.session_state.messages) - 1
-            
-            # Reset rerun state
-            st.session_state.rerun_message_index = None
-            st.session_state.rerun_model = None
-            
-            # Rerun to update the UI
-            st.rerun()
-            
+            # Stream the response from the selected model
+            with st.spinner(f"Getting response from {rerun_model}..."):
+                response_text, metrics = stream_to_placeholder(
+                    router.send_prompt_stream(full_messages, model_id=rerun_model),
+                    response_placeholder
+                )
         except Exception as e:
             # Add error message to chat
             error_message = f"Error: {str(e)}"
@@ -458,16 +385,106 @@ def execute_rerun(router, messages_context, user_msg_index):
             # Reset rerun state
             st.session_state.rerun_message_index = None
             st.session_state.rerun_model = None
+            return
+    
+    # Calculate and add cost
+    model = metrics.get("model", "unknown")
+    tokens = metrics.get("token_count", 0)
+    metrics["cost"] = router.calculate_cost(tokens, model)
+    
+    # Add assistant message to chat at the end
+    assistant_message = {"role": "assistant", "content": response_text}
+    st.session_state.messages.append(assistant_message)
+    st.session_state.full_messages.append(assistant_message)
+    
+    # Store metrics and update the running totals
+    record_metrics(metrics, len(st.session_state.messages) - 1)
+    
+    # Add to rerun responses mapping
+    if user_msg_index not in st.session_state.rerun_responses:
+        st.session_state.rerun_responses[user_msg_index] = {}
+        
+    response_index = len(st.session_state.messages) - 1
+    st.session_state.rerun_responses[user_msg_index][rerun_model] = response_index
+    st.session_state.rerun_index[response_index] = rerun_model
+    
+    # Reset rerun state
+    st.session_state.rerun_message_index = None
+    st.session_state.rerun_model = None
+    
+    # Rerun to draw the new message with its metrics and rerun label
+    st.rerun()
+
+def record_metrics(metrics, message_index):
+    """Store a response's metrics against its message and add them to the running totals"""
+    # Fill every displayed field once so readers can index the record directly
+    for field, default in METRIC_DEFAULTS.items():
+        metrics.setdefault(field, default)
+    
+    st.session_state.metrics.append(metrics)
+    st.session_state.metrics_by_index[message_index] = metrics
+    st.session_state.conversation_cost += metrics["cost"]
+    
+    totals = st.session_state.running_totals
+    totals["prompt"] += metrics["prompt_tokens"]
+    totals["completion"] += metrics["completion_tokens"]
+    totals["total"] += metrics["token_count"]
+    
+    stats = st.session_state.model_stats.setdefault(metrics["model"], {"tokens": 0, "cost": 0.0, "count": 0})
+    stats["tokens"] += metrics["token_count"]
+    stats["cost"] += metrics["cost"]
+    stats["count"] += 1
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _token_df(prompt_tokens, completion_tokens, total_tokens):
+    """Token usage breakdown table (cached per set of running totals)"""
+    # Imported here; pandas is only needed once there is a summary to show
+    import pandas as pd
+    
+    def percentage(tokens):
+        return f"{(tokens / total_tokens) * 100:.1f}%" if total_tokens > 0 else "0%"
+    
+    return pd.DataFrame({
+        "Category": ["Prompt", "Completion", "Total"],
+        "Tokens": [prompt_tokens, completion_tokens, total_tokens],
+        "Percentage": [percentage(prompt_tokens), percentage(completion_tokens), "100%"]
+    })
+
+@st.cache_data(max_entries=16, show_spinner=False)
+def _model_df(model_rows):
+    """Per-model usage table from (model, responses, tokens, cost) tuples (cached)"""
+    import pandas as pd
+    
+    return pd.DataFrame([
+        {
+            "Model": model,
+            "Responses": count,
+            "Total Tokens": f"{tokens:,}",
+            "Total Cost": f"${cost:.6f}",
+            "Avg Tokens/Response": f"{tokens // count:,}" if count > 0 else "0"
+        }
+        for model, count, tokens, cost in model_rows
+    ])
 
 def display_cost_summary():
     """Display summary of conversation cost and token usage"""
     if not st.session_state.metrics:
         return
     
-    # Calculate totals
-    total_tokens = sum(m.get("token_count", 0) for m in st.session_state.metrics)
-    total_prompt_tokens = sum(m.get("prompt_tokens", 0) for m in st.session_state.metrics)
-    total_completion_tokens = sum(m.get("completion_tokens", 0) for m in st.session_state.metrics)
+    # With metrics hidden, show only the running cost
+    if not st.session_state.show_metrics:
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Total Cost", f"${st.session_state.conversation_cost:.6f}")
+        with col2:
+            st.metric("Responses", f"{len(st.session_state.metrics)}")
+        return
+    
+    # Read the running totals
+    totals = st.session_state.running_totals
+    total_tokens = totals["total"]
+    total_prompt_tokens = totals["prompt"]
+    total_completion_tokens = totals["completion"]
     total_cost = st.session_state.conversation_cost
     
     # Show summary
@@ -483,55 +500,26 @@ def display_cost_summary():
     
     with col3:
         # Calculate the actual messages excluding reruns
-        original_messages = len([m for m in st.session_state.messages if m["role"] == "user"])
-        st.metric("Unique Prompts", f"{original_messages}")
-    
-    # Add a breakdown of token usage
-    token_data = {
-        "Category": ["Prompt", "Completion", "Total"],
-        "Tokens": [total_prompt_tokens, total_completion_tokens, total_tokens],
-        "Percentage": [
-            f"{(total_prompt_tokens / total_tokens) * 100:.1f}%" if total_tokens > 0 else "0%",
-            f"{(total_completion_tokens / total_tokens) * 100:.1f}%" if total_tokens > 0 else "0%",
-            "100%"
-        ]
-    }
+        st.metric("Unique Prompts", f"{len(st.session_state.user_indices)}")
     
+    # Breakdown of token usage
     st.markdown("#### Token Usage Breakdown")
-    st.dataframe(token_data, use_container_width=True)
+    st.dataframe(
+        _token_df(total_prompt_tokens, total_completion_tokens, total_tokens),
+        use_container_width=True
+    )
     
     # Add model usage breakdown if there are reruns
     if st.session_state.rerun_responses:
         st.markdown("#### Model Usage")
         
-        # Count responses by model
-        model_usage = {}
-        for metrics in st.session_state.metrics:
-            model = metrics.get("model", "Unknown")
-            if model not in model_usage:
-                model_usage[model] = {
-                    "count": 0,
-                    "tokens": 0,
-                    "cost": 0
-                }
-            
-            model_usage[model]["count"] += 1
-            model_usage[model]["tokens"] += metrics.get("token_count", 0)
-            model_usage[model]["cost"] += metrics.get("cost", 0)
-        
-        # Create data for display
-        model_data = []
-        for model, stats in model_usage.items():
-            model_data.append({
-                "Model": model,
-                "Responses": stats["count"],
-                "Total Tokens": f"{stats['tokens']:,}",
-                "Total Cost": f"${stats['cost']:.6f}",
-                "Avg Tokens/Response": f"{int(stats['tokens'] / stats['count']):,}" if stats['count'] > 0 else "0"
-            })
+        model_rows = tuple(
+            (model, stats["count"], stats["tokens"], stats["cost"])
+            for model, stats in st.session_state.model_stats.items()
+        )
         
         # Display as table
-        st.dataframe(model_data, use_container_width=True)
+        st.dataframe(_model_df(model_rows), use_container_width=True)
 
 def display_sidebar(config, router):
     """Display and handle sidebar elements"""
@@ -548,7 +536,8 @@ def display_sidebar(config, router):
     
     if st.session_state.manual_model_selection:
         # Get available models
-        available_models = sorted(config.get("models", {}).keys())
+        models_cfg = config.get("models", {})
+        available_models = list(get_model_names(models_cfg))
         
         if available_models:
             # Set default to the first model if none selected
@@ -563,7 +552,7 @@ def display_sidebar(config, router):
             )
             
             # Show model info
-            model_info = config.get("models", {}).get(st.session_state.selected_model, {})
+            model_info = models_cfg.get(st.session_state.selected_model, {})
             if model_info:
                 st.sidebar.markdown(f"**Provider:** {model_info.get('provider', 'Unknown')}")
                 st.sidebar.markdown(f"**Cost:** ${model_info.get('cost_per_1k_tokens', 0):.6f} per 1K tokens")
@@ -651,9 +640,15 @@ def display_sidebar(config, router):
     # Reset button for chat
     if st.sidebar.button("Reset Conversation"):
         st.session_state.messages = []
+        st.session_state.user_indices = []
+        st.session_state.full_messages = [system_message()]
         st.session_state.metrics = []
+        st.session_state.metrics_by_index = {}
         st.session_state.conversation_cost = 0.0
+        st.session_state.running_totals = {"prompt": 0, "completion": 0, "total": 0}
+        st.session_state.model_stats = {}
         st.session_state.rerun_responses = {}
+        st.session_state.rerun_index = {}
         st.session_state.rerun_message_index = None
         st.session_state.rerun_model = None
         st.rerun()
@@ -669,21 +664,36 @@ def display_sidebar(config, router):
     )
 
 def process_user_input(router):
-    """Process user input and get model response"""
+    """
+    Process user input and stream the model response
+    
+    Called before the chat history is drawn so the new turn renders in the
+    same script run, without a follow-up st.rerun(). While the response
+    streams it is shown in a temporary placeholder, which is cleared once
+    the turn has been added to the history.
+    """
     # User input
     user_input = st.chat_input("Type your message here...")
     
     if user_input:
         # Add user message to chat
-        st.session_state.messages.append({"role": "user", "content": user_input})
+        user_message = {"role": "user", "content": user_input}
+        st.session_state.messages.append(user_message)
+        st.session_state.user_indices.append(len(st.session_state.messages) - 1)
         
-        # Prepare complete message history including system prompt
-        full_messages = [
-            {"role": "system", "content": st.session_state.system_prompt}
-        ] + st.session_state.messages
+        # Extend the complete message history in place, refreshing the system prompt if it changed
+        full_messages = st.session_state.full_messages
+        full_messages[0] = system_message()
+        full_messages.append(user_message)
         
-        # Display "thinking" spinner while processing
-        with st.spinner("Thinking..."):
+        # Show the turn live while it streams
+        live_turn = st.empty()
+        with live_turn.container(), st.spinner("Thinking..."):
+            with st.chat_message("user"):
+                st.markdown(user_input)
+            with st.chat_message("assistant"):
+                response_placeholder = st.empty()
+            
             try:
                 # Use selected model if manual selection is enabled
                 model_override = None
@@ -693,10 +703,11 @@ def process_user_input(router):
                     # Apply current routing strategy
                     router.set_routing_strategy(st.session_state.routing_strategy)
                 
-                # Get response from router
-                start_time = time.time()
-                response_text, metrics = router.send_prompt(full_messages, model_id=model_override)
-                total_time = time.time() - start_time
+                # Stream the response from the router
+                response_text, metrics = stream_to_placeholder(
+                    router.send_prompt_stream(full_messages, model_id=model_override),
+                    response_placeholder
+                )
                 
                 # Get routing explanation if available
                 if not model_override and hasattr(router, 'get_routing_explanation'):
@@ -704,7 +715,9 @@ def process_user_input(router):
                     metrics["routing_explanation"] = routing_explanation
                 
                 # Add assistant message to chat
-                st.session_state.messages.append({"role": "assistant", "content": response_text})
+                assistant_message = {"role": "assistant", "content": response_text}
+                st.session_state.messages.append(assistant_message)
+                full_messages.append(assistant_message)
                 
                 # Calculate and add cost
                 model = metrics.get("model", "unknown")
@@ -714,22 +727,23 @@ def process_user_input(router):
                 # Add cost to metrics
                 metrics["cost"] = cost
                 
-                # Update total conversation cost
-                st.session_state.conversation_cost += cost
-                
-                # Store metrics
-                st.session_state.metrics.append(metrics)
-                
-                # Rerun to update the UI
-                st.rerun()
+                # Store metrics and update the running totals
+                record_metrics(metrics, len(st.session_state.messages) - 1)
             except Exception as e:
                 # Add error message to chat
                 error_message = f"Error: {str(e)}"
-                st.session_state.messages.append({"role": "assistant", "content": error_message})
-                st.rerun()
+                assistant_message = {"role": "assistant", "content": error_message}
+                st.session_state.messages.append(assistant_message)
+                full_messages.append(assistant_message)
+        
+        # The completed turn is drawn with the rest of the history
+        live_turn.empty()
 
 def main():
     """Main application function"""
+    # Inject custom styles
+    st.markdown(CUSTOM_CSS, unsafe_allow_html=True)
+    
     # Initialize session state
     initialize_session_state()
     
@@ -737,7 +751,7 @@ def main():
     config = load_config()
     
     # Initialize router
-    router = initialize_router(config)
+    router = initialize_router(config, config_mtime())
     
     if router is None:
         st.error("Failed to initialize the router. Please check your configuration.")
@@ -753,12 +767,18 @@ def main():
         "Try the same prompt with different models by clicking the 'Try with different model' button next to any message."
     )
     
-    # Display chat messages
-    display_chat_messages(config, router)
+    # Reserve the history slot first so a streaming reply renders below it
+    history_container = st.container()
     
-    # Process user input
+    # Process user input (chat_input stays pinned to the bottom of the page)
     process_user_input(router)
     
+    # Display chat messages, then stream any requested rerun at the end of the history
+    with history_container:
+        display_chat_messages(config, router)
+        if st.session_state.rerun_model and st.session_state.rerun_message_index is not None:
+            execute_rerun(router, st.session_state.rerun_message_index, config)
+    
     # Display cost and usage summary
     if st.session_state.metrics:
         st.markdown("---")
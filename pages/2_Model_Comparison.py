@@ -6,29 +6,67 @@ Compare responses from multiple LLMs side by side to evaluate performance and su
 """
 
 import os
+import re
 import sys
-import yaml
+import html
+import difflib
+import hashlib
 import time
 import json
+import queue
+import requests
+import threading
 import streamlit as st
-import pandas as pd
-import plotly.express as px
+from collections import deque, defaultdict
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime
+from requests.adapters import HTTPAdapter
 from typing import Dict, List, Any, Optional, Tuple
 
-# Add the src directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the project root to the path (once; Streamlit re-executes this script on every rerun)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
 # Import the required modules
 try:
     from src.utils.rule_based_router import RuleBasedRouter
     from src.utils.cost_tracker import CostTracker
-    from src.api.openrouter_client_enhanced import send_prompt_to_openrouter
+    from src.config.config_loader import load_config as load_yaml_config
+    from src.api.openrouter_client_enhanced import stream_prompt_to_openrouter
 except ImportError as e:
     st.error(f"Error importing required modules: {e}")
     st.info("Make sure all dependencies are installed and the project structure is correct.")
     sys.exit(1)
 
+# Number of past comparisons kept in memory per session (adjustable in the sidebar)
+DEFAULT_HISTORY_SIZE = 50
+
+# Display names for the per-response metrics columns
+METRIC_COLUMNS = {
+    "model": "Model",
+    "response_length": "Response Length (chars)",
+    "total_tokens": "Total Tokens",
+    "latency": "Latency (s)",
+    "cost": "Cost ($)",
+}
+
+# Responses longer than this are diffed sentence by sentence instead of word by word
+SENTENCE_DIFF_THRESHOLD = 4000
+
+# Every finished comparison is appended here as one JSON line
+HISTORY_EXPORT_PATH = os.path.join("exports", "history.jsonl")
+
+try:
+    # orjson serializes export lines several times faster than the stdlib
+    import orjson
+    
+    def _dump_line(obj: Any) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NAIVE_UTC | orjson.OPT_APPEND_NEWLINE)
+except ImportError:
+    def _dump_line(obj: Any) -> bytes:
+        return (json.dumps(obj, default=str) + "\n").encode()
+
 # Page config
 st.set_page_config(
     page_title="OpenRouter LLM Suite - Model Comparison",
@@ -136,12 +174,20 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
-@st.cache_resource
+@st.cache_data(max_entries=4, show_spinner=False)
+def _load_config_file(mtime):
+    """
+    Parse config.yaml; cached per modification time, so edits are picked up
+    
+    config_loader parses with libyaml's CSafeLoader when available and keeps a
+    pickle sidecar, so new processes skip YAML parsing entirely.
+    """
+    return load_yaml_config("config.yaml")
+
 def load_config():
-    """Load configuration from config.yaml"""
+    """Load configuration from config.yaml (each caller gets its own copy)"""
     try:
-        with open("config.yaml", "r") as f:
-            return yaml.safe_load(f)
+        return _load_config_file(os.path.getmtime("config.yaml"))
     except Exception as e:
         st.error(f"Error loading configuration: {e}")
         return {}
@@ -156,16 +202,42 @@ def initialize_router(config):
         st.error(f"Error initializing router: {e}")
         return None
 
-def initialize_session_state():
+@st.cache_resource
+def get_http_session():
+    """Shared HTTP session so comparisons reuse pooled keep-alive connections"""
+    session = requests.Session()
+    # Enough pooled connections for every model in a concurrent comparison
+    session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=32))
+    return session
+
+def warm_up_connection(session):
+    """Open a pooled connection to OpenRouter ahead of the first comparison"""
+    try:
+        session.head("https://openrouter.ai/api/v1/models", timeout=5)
+    except requests.exceptions.RequestException:
+        pass
+
+def initialize_session_state(config):
     """Initialize session state variables"""
+    if "history_size" not in st.session_state:
+        st.session_state.history_size = DEFAULT_HISTORY_SIZE
+    
+    # Bounded so long sessions don't accumulate every response ever compared
     if "comparison_history" not in st.session_state:
-        st.session_state.comparison_history = []
+        st.session_state.comparison_history = deque(maxlen=st.session_state.history_size)
     
     if "current_prompt" not in st.session_state:
         st.session_state.current_prompt = ""
     
+    # A set for O(1) checkbox bookkeeping; sorted wherever order matters
     if "selected_models" not in st.session_state:
-        st.session_state.selected_models = []
+        st.session_state.selected_models = set()
+    
+    # Model checkboxes read their state only from these keys
+    for model_id in config.get("models", {}):
+        key = f"model_{model_id}"
+        if key not in st.session_state:
+            st.session_state[key] = model_id in st.session_state.selected_models
     
     if "model_responses" not in st.session_state:
         st.session_state.model_responses = {}
@@ -181,44 +253,96 @@ def initialize_session_state():
     
     if "compare_running" not in st.session_state:
         st.session_state.compare_running = False
+    
+    # Flat per-response metrics for the latest comparison, replaced when each one finishes
+    if "metrics_rows" not in st.session_state:
+        st.session_state.metrics_rows = []
+    
+    if "comparison_id" not in st.session_state:
+        st.session_state.comparison_id = 0
 
-def get_model_response(model_id, prompt, system_prompt="You are a helpful AI assistant.", router=None):
-    """Get response from a specific model"""
+@st.cache_data(ttl=3600, max_entries=500, show_spinner=False)
+def _get_model_response_cached(model_id, prompt, system_prompt, temperature, max_tokens, _session=None, _on_delta=None, _timing=None):
+    """
+    Stream the prompt to a model and return the deterministic parts of the result
+    
+    Cached per (model, prompt, system prompt, parameters) for an hour, so
+    re-running a comparison doesn't pay for the same completion twice. Errors
+    raise and are not cached. On a cache miss each text chunk is passed to
+    _on_delta as it arrives and the call's timings are written into the
+    _timing dict; a hit returns at once without touching either, so callers
+    can tell the two apart. Only the response and token usage are cached.
+    """
     messages = [
         {"role": "system", "content": system_prompt},
         {"role": "user", "content": prompt}
     ]
     
+    # Stream directly from OpenRouter; the last item is the usage stats dict
+    chunks = []
+    usage_stats = {}
+    for item in stream_prompt_to_openrouter(
+        messages=messages,
+        model=model_id,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        session=_session
+    ):
+        if isinstance(item, dict):
+            usage_stats = item
+        else:
+            chunks.append(item)
+            if _on_delta:
+                _on_delta(item)
+    
+    # Timings belong to this call only, not to later cache hits
+    timing_keys = ("latency", "first_token_latency", "timestamp")
+    if _timing is not None:
+        _timing.update({key: usage_stats[key] for key in timing_keys if key in usage_stats})
+        _timing.setdefault("latency", 0)
+    
+    return {
+        "response": "".join(chunks),
+        "usage_stats": {key: value for key, value in usage_stats.items() if key not in timing_keys}
+    }
+
+def get_model_response(model_id, prompt, model_info, system_prompt="You are a helpful AI assistant.", session=None, on_delta=None):
+    """
+    Get response from a specific model, using its config entry for parameters
+    
+    on_delta, if given, is called with each chunk of text as it streams in.
+    """
     start_time = time.time()
     
     try:
-        # Get model-specific parameters from config
-        config = load_config()
-        model_info = config.get("models", {}).get(model_id, {})
+        # Get model-specific parameters
         temperature = model_info.get("temperature", 0.7)
         max_tokens = min(model_info.get("max_tokens", 1000), 4000)  # Cap at 4000 to prevent errors
         
-        # Send request directly to OpenRouter
-        response_text, usage_stats, latency = send_prompt_to_openrouter(
-            messages=messages,
-            model=model_id,
-            temperature=temperature,
-            max_tokens=max_tokens
+        # Leading/trailing whitespace doesn't change the request, so it shouldn't miss the cache
+        timing = {}
+        result = _get_model_response_cached(
+            model_id,
+            prompt.strip(),
+            system_prompt.strip(),
+            temperature,
+            max_tokens,
+            _session=session,
+            _on_delta=on_delta,
+            _timing=timing
         )
         
-        total_time = time.time() - start_time
-        
-        # Calculate cost
-        cost_per_1k = model_info.get("cost_per_1k_tokens", 0)
-        cost = (usage_stats.get("total_tokens", 0) * cost_per_1k) / 1000
+        # A cache hit made no request: report the lookup time and no new cost
+        cached = not timing
+        total_tokens = result["usage_stats"].get("total_tokens", 0)
         
         return {
             "model": model_id,
-            "response": response_text,
-            "usage_stats": usage_stats,
-            "latency": latency,
-            "total_time": total_time,
-            "cost": cost,
+            **result,
+            "latency": time.time() - start_time if cached else timing["latency"],
+            "cost": 0.0 if cached else (total_tokens * model_info.get("cost_per_1k_tokens", 0)) / 1000,
+            "cached": cached,
+            "total_time": time.time() - start_time,
             "timestamp": datetime.now().isoformat(),
             "success": True
         }
@@ -232,51 +356,187 @@ def get_model_response(model_id, prompt, system_prompt="You are a helpful AI ass
             "success": False
         }
 
-def display_model_header(model_id, config):
-    """Display model header with info"""
+def model_header_html(model_id, config):
+    """Build the model header HTML with name and provider tags"""
     model_info = config.get("models", {}).get(model_id, {})
     provider = model_info.get("provider", "Unknown")
     
-    header_html = f"""
-    <div class="model-header">
-        <span class="model-tag">{model_info.get('name', model_id)}</span>
-        <span class="provider-tag">{provider}</span>
-    </div>
+    return (
+        f'<div class="model-header">'
+        f'<span class="model-tag">{model_info.get("name", model_id)}</span> '
+        f'<span class="provider-tag">{provider}</span>'
+        f'</div>'
+    )
+
+def render_response_html(response_data, diff_html=None):
     """
+    Build the response and metrics HTML for a successful response
     
-    st.markdown(header_html, unsafe_allow_html=True)
+    The plain rendering is computed once when the comparison finishes and
+    stored under "_rendered_html"; reruns reuse it unless a diff is shown.
+    """
+    if diff_html is None and "_rendered_html" in response_data:
+        return response_data["_rendered_html"]
+    
+    response_html = f'<div class="model-response">{diff_html or response_data["response"]}</div>'
+    
+    # Metrics if available
+    if "usage_stats" not in response_data:
+        return response_html
+    
+    usage_stats = response_data["usage_stats"]
+    return response_html + (
+        f'<div class="metrics-container">'
+        f'<div class="token-usage">Tokens: {usage_stats.get("prompt_tokens", 0)} (prompt) + '
+        f'{usage_stats.get("completion_tokens", 0)} (completion) = {usage_stats.get("total_tokens", 0)}</div>'
+        f'<div class="cost">Cost: ${response_data.get("cost", 0):.6f}</div>'
+        f'<div class="latency">Latency: {response_data.get("latency", 0):.2f}s'
+        f'{" (cached)" if response_data.get("cached") else ""}</div>'
+        f'</div>'
+    )
 
-def display_model_response(response_data):
-    """Display a model's response with metrics"""
+def display_model_response(model_id, config, response_data, diff_html=None):
+    """Display a model's header, response and metrics (or highlighted diff if given)"""
+    header_html = model_header_html(model_id, config)
+    
     if not response_data:
+        st.markdown(header_html, unsafe_allow_html=True)
         st.markdown("*No response yet*")
         return
     
     # Check if there was an error
     if not response_data.get("success", False):
+        st.markdown(header_html, unsafe_allow_html=True)
         st.error(f"Error: {response_data.get('error', 'Unknown error')}")
         return
     
-    # Display the response
-    st.markdown(f'<div class="model-response">{response_data["response"]}</div>', unsafe_allow_html=True)
+    # Header, response and metrics go out as a single element
+    st.markdown(header_html + render_response_html(response_data, diff_html), unsafe_allow_html=True)
+
+def _split_for_diff(text, by_sentence):
+    """Split text into diffable tokens that join back into the original"""
+    pattern = r"(?<=[.!?])(\s+)" if by_sentence else r"(\s+)"
+    return [token for token in re.split(pattern, text) if token]
+
+@st.cache_data(max_entries=100, show_spinner=False)
+def compute_pairwise_diffs(signature, _responses):
+    """
+    Highlight how each response differs from the first one
+    
+    Cached by signature, a tuple of (model_id, sha1 of response) pairs, so the
+    diffs are computed once per set of responses rather than on every rerun.
+    
+    Args:
+        signature: Tuple of (model_id, response hash) pairs identifying _responses
+        _responses: Tuple of (model_id, response) pairs; the first is the reference
+        
+    Returns:
+        Dictionary mapping each non-reference model ID to its highlighted HTML
+    """
+    (_, reference), *others = _responses
+    diffs = {}
     
-    # Display metrics if available
-    if "usage_stats" in response_data:
-        prompt_tokens = response_data.get("usage_stats", {}).get("prompt_tokens", 0)
-        completion_tokens = response_data.get("usage_stats", {}).get("completion_tokens", 0)
-        total_tokens = response_data.get("usage_stats", {}).get("total_tokens", 0)
-        latency = response_data.get("latency", 0)
-        cost = response_data.get("cost", 0)
+    for model_id, response in others:
+        by_sentence = max(len(reference), len(response)) > SENTENCE_DIFF_THRESHOLD
+        a = _split_for_diff(reference, by_sentence)
+        b = _split_for_diff(response, by_sentence)
         
-        metrics_html = f"""
-        <div class="metrics-container">
-            <div class="token-usage">Tokens: {prompt_tokens} (prompt) + {completion_tokens} (completion) = {total_tokens}</div>
-            <div class="cost">Cost: ${cost:.6f}</div>
-            <div class="latency">Latency: {latency:.2f}s</div>
-        </div>
-        """
+        parts = []
+        for tag, i1, i2, j1, j2 in difflib.SequenceMatcher(a=a, b=b, autojunk=False).get_opcodes():
+            if tag == "equal":
+                parts.append(html.escape("".join(b[j1:j2])))
+                continue
+            if tag in ("delete", "replace"):
+                parts.append(f'<span class="diff-highlight-remove">{html.escape("".join(a[i1:i2]))}</span>')
+            if tag in ("insert", "replace"):
+                parts.append(f'<span class="diff-highlight-add">{html.escape("".join(b[j1:j2]))}</span>')
+        
+        diffs[model_id] = "".join(parts)
+    
+    return diffs
+
+def get_response_diffs(selected_models):
+    """Return highlighted diffs against the first successful response, if enabled"""
+    if not st.session_state.highlight_differences:
+        return {}
+    
+    responses = tuple(
+        (model_id, response_data["response"])
+        for model_id in selected_models
+        for response_data in [st.session_state.model_responses.get(model_id, {})]
+        if response_data.get("success", False)
+    )
+    if len(responses) < 2:
+        return {}
+    
+    signature = tuple((model_id, hashlib.sha1(response.encode()).hexdigest()) for model_id, response in responses)
+    return compute_pairwise_diffs(signature, responses)
+
+def submit_comparison_batch(prompts, model_infos, system_prompt="You are a helpful AI assistant.", session=None, on_progress=None, on_delta=None):
+    """
+    Get responses for every (prompt, model) pair in one concurrent batch
+    
+    All pairs are dispatched at once over a shared thread pool; the calls are
+    network-bound, so a batch takes about as long as its slowest call instead
+    of the sum. Results are collected as they complete. Callbacks always run
+    on the calling thread, so they may update Streamlit elements.
+    
+    Args:
+        prompts: User prompts to send
+        model_infos: Mapping of model ID to its config entry
+        system_prompt: System prompt used for every request
+        session: Optional pooled requests.Session to send through
+        on_progress: Optional callback called with (completed, total) after each response
+        on_delta: Optional callback called with ((prompt, model_id), text) as
+            responses stream in; text is everything received since the last call
+        
+    Returns:
+        Dictionary mapping (prompt, model_id) to the get_model_response result
+    """
+    pairs = [(prompt, model_id) for prompt in prompts for model_id in model_infos]
+    if not pairs:
+        return {}
+    
+    # Workers queue streamed text; it is handed to on_delta here, on the calling thread
+    deltas = queue.SimpleQueue()
+    
+    def forward_deltas(key):
+        return (lambda text: deltas.put((key, text))) if on_delta else None
+    
+    def drain_deltas():
+        pending_text = {}
+        while not deltas.empty():
+            key, text = deltas.get()
+            pending_text.setdefault(key, []).append(text)
+        for key, texts in pending_text.items():
+            on_delta(key, "".join(texts))
+    
+    results = {}
+    with ThreadPoolExecutor(max_workers=min(len(pairs), 32)) as executor:
+        futures = {
+            executor.submit(
+                get_model_response,
+                model_id=model_id,
+                prompt=prompt,
+                model_info=model_infos[model_id],
+                system_prompt=system_prompt,
+                session=session,
+                on_delta=forward_deltas((prompt, model_id))
+            ): (prompt, model_id)
+            for prompt, model_id in pairs
+        }
         
-        st.markdown(metrics_html, unsafe_allow_html=True)
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=0.1, return_when=FIRST_COMPLETED)
+            if on_delta:
+                drain_deltas()
+            for future in done:
+                results[futures[future]] = future.result()
+                if on_progress:
+                    on_progress(len(results), len(pairs))
+    
+    return results
 
 def compare_responses():
     """Compare responses from selected models"""
@@ -296,27 +556,69 @@ def compare_responses():
     # Clear previous responses
     st.session_state.model_responses = {}
     
-    # Get responses from each model
-    for i, model_id in enumerate(st.session_state.selected_models):
-        status_text.text(f"Getting response from {model_id}...")
-        
-        response_data = get_model_response(
-            model_id=model_id,
-            prompt=st.session_state.current_prompt,
-            system_prompt=st.session_state.system_prompt
-        )
-        
-        st.session_state.model_responses[model_id] = response_data
-        progress_bar.progress((i + 1) / len(st.session_state.selected_models))
+    selected_models = sorted(st.session_state.selected_models)
+    config = load_config()
+    model_infos = {model_id: config.get("models", {}).get(model_id, {}) for model_id in selected_models}
+    status_text.text(f"Getting responses from {len(selected_models)} models...")
+    
+    # Live preview of each response as it streams in, laid out like the side-by-side view
+    live_area = st.empty()
+    with live_area.container():
+        cols = st.columns(min(len(selected_models), 3))
+        placeholders = {model_id: cols[i % len(cols)].empty() for i, model_id in enumerate(selected_models)}
+    streamed = {model_id: [] for model_id in selected_models}
+    
+    def show_delta(key, text):
+        model_id = key[1]
+        streamed[model_id].append(text)
+        model_name = model_infos[model_id].get("name", model_id)
+        placeholders[model_id].markdown(f"**{model_name}**\n\n" + "".join(streamed[model_id]) + "▌")
+    
+    results = submit_comparison_batch(
+        [st.session_state.current_prompt],
+        model_infos,
+        system_prompt=st.session_state.system_prompt,
+        session=get_http_session(),
+        on_progress=lambda done, total: progress_bar.progress(done / total),
+        on_delta=show_delta
+    )
+    live_area.empty()
     
-    # Save comparison to history
-    st.session_state.comparison_history.append({
+    # Keep responses in selection order
+    st.session_state.model_responses = {
+        model_id: results[(st.session_state.current_prompt, model_id)] for model_id in selected_models
+    }
+    
+    # Pre-render successful responses so reruns re-emit the cached HTML
+    for response_data in st.session_state.model_responses.values():
+        if response_data["success"]:
+            response_data["_rendered_html"] = render_response_html(response_data)
+    
+    # Record metrics for successful responses (only the latest comparison is kept)
+    st.session_state.comparison_id += 1
+    st.session_state.metrics_rows = [
+        {
+            "model": model_id,
+            "response_length": len(response_data["response"]),
+            "total_tokens": response_data["usage_stats"].get("total_tokens", 0),
+            "latency": response_data["latency"],
+            # Cached responses were already paid for
+            "cost_per_1k": 0 if response_data.get("cached") else model_infos[model_id].get("cost_per_1k_tokens", 0),
+        }
+        for model_id, response_data in st.session_state.model_responses.items()
+        if response_data["success"]
+    ]
+    
+    # Save comparison to history and append it to the export file
+    entry = {
         "prompt": st.session_state.current_prompt,
         "system_prompt": st.session_state.system_prompt,
-        "models": st.session_state.selected_models,
+        "models": selected_models,
         "responses": st.session_state.model_responses,
         "timestamp": datetime.now().isoformat()
-    })
+    }
+    st.session_state.comparison_history.append(entry)
+    append_comparison_to_file(entry)
     
     status_text.text("Comparison complete!")
     time.sleep(0.5)
@@ -325,72 +627,120 @@ def compare_responses():
     
     st.session_state.compare_running = False
 
-def display_side_by_side_comparison():
+def display_side_by_side_comparison(config):
     """Display models side by side"""
     if not st.session_state.model_responses:
         return
     
-    num_models = len(st.session_state.selected_models)
+    selected_models = sorted(st.session_state.selected_models)
+    num_models = len(selected_models)
     if num_models == 0:
         return
     
     # Create columns
     cols = st.columns(min(num_models, 3))
-    
-    # Get config for model info
-    config = load_config()
+    diffs = get_response_diffs(selected_models)
     
     # Display responses in columns
-    for i, model_id in enumerate(st.session_state.selected_models):
+    for i, model_id in enumerate(selected_models):
         col_idx = i % len(cols)
         
         with cols[col_idx]:
-            display_model_header(model_id, config)
-            display_model_response(st.session_state.model_responses.get(model_id, {}))
+            display_model_response(model_id, config, st.session_state.model_responses.get(model_id, {}), diffs.get(model_id))
 
-def display_tabbed_comparison():
+def display_tabbed_comparison(config):
     """Display models in tabs"""
     if not st.session_state.model_responses:
         return
     
-    num_models = len(st.session_state.selected_models)
+    selected_models = sorted(st.session_state.selected_models)
+    num_models = len(selected_models)
     if num_models == 0:
         return
     
-    # Get config for model info
-    config = load_config()
-    
     # Create tabs
-    tabs = st.tabs(st.session_state.selected_models)
+    tabs = st.tabs(selected_models)
+    diffs = get_response_diffs(selected_models)
     
     # Display responses in tabs
-    for i, model_id in enumerate(st.session_state.selected_models):
+    for i, model_id in enumerate(selected_models):
         with tabs[i]:
-            display_model_header(model_id, config)
-            display_model_response(st.session_state.model_responses.get(model_id, {}))
+            display_model_response(model_id, config, st.session_state.model_responses.get(model_id, {}), diffs.get(model_id))
 
 def calculate_comparison_metrics():
     """Calculate comparison metrics between models"""
     if not st.session_state.model_responses or len(st.session_state.selected_models) < 2:
         return None
     
-    metrics = []
+    # Imported here so pages that never show metrics don't pay for it
+    import pandas as pd
     
-    for model_id in st.session_state.selected_models:
-        response_data = st.session_state.model_responses.get(model_id, {})
-        
-        if not response_data or not response_data.get("success", False):
-            continue
+    # Built once per comparison from the recorded rows, then reused across reruns
+    comparison_id = st.session_state.comparison_id
+    cached = st.session_state.get("metrics_df")
+    if cached is None or cached[0] != comparison_id:
+        metrics_df = pd.DataFrame(
+            st.session_state.metrics_rows,
+            columns=["model", "response_length", "total_tokens", "latency", "cost_per_1k"]
+        )
         
-        metrics.append({
-            "Model": model_id,
-            "Response Length (chars)": len(response_data.get("response", "")),
-            "Total Tokens": response_data.get("usage_stats", {}).get("total_tokens", 0),
-            "Latency (s)": response_data.get("latency", 0),
-            "Cost ($)": response_data.get("cost", 0),
-        })
+        # Price every row in one vectorized pass
+        metrics_df["cost"] = metrics_df["total_tokens"].to_numpy(dtype=float) * metrics_df["cost_per_1k"].to_numpy(dtype=float) * 1e-3
+        cached = (comparison_id, metrics_df[list(METRIC_COLUMNS)].rename(columns=METRIC_COLUMNS))
+        st.session_state.metrics_df = cached
+    
+    # Only models that are still selected
+    metrics_df = cached[1]
+    return metrics_df[metrics_df["Model"].isin(st.session_state.selected_models)].reset_index(drop=True)
+
+@st.cache_data(max_entries=20, show_spinner=False)
+def _build_metrics_df_and_figs(signature):
+    """
+    Build the metrics table and charts for one set of responses
+    
+    Cached by signature, a tuple of metrics rows (model, response length,
+    tokens, latency, cost), so reruns that don't change the responses, such as
+    sidebar toggles and view switches, skip figure construction entirely.
+    """
+    # Imported here; pandas and plotly are only needed once there are metrics to chart
+    import pandas as pd
+    import plotly.express as px
     
-    return pd.DataFrame(metrics)
+    metrics_df = pd.DataFrame(list(signature), columns=list(METRIC_COLUMNS.values()))
+    
+    # Token usage
+    fig1 = px.bar(
+        metrics_df, 
+        x="Model", 
+        y="Total Tokens", 
+        title="Token Usage by Model",
+        color="Model"
+    )
+    
+    # Cost comparison
+    fig2 = px.bar(
+        metrics_df, 
+        x="Model", 
+        y="Cost ($)", 
+        title="Cost Comparison",
+        color="Model"
+    )
+    
+    # Latency comparison
+    fig3 = px.bar(
+        metrics_df, 
+        x="Model", 
+        y="Latency (s)", 
+        title="Response Time Comparison",
+        color="Model"
+    )
+    
+    # Fixed height and tight margins keep the layout stable across reruns;
+    # the legend only repeats the x-axis labels
+    for fig in (fig1, fig2, fig3):
+        fig.update_layout(height=300, margin=dict(l=20, r=10, t=40, b=20), showlegend=False)
+    
+    return metrics_df, fig1, fig2, fig3
 
 def display_comparison_metrics():
     """Display metrics comparing the models"""
@@ -401,6 +751,8 @@ def display_comparison_metrics():
     
     st.markdown("### Comparison Metrics")
     
+    metrics_df, fig1, fig2, fig3 = _build_metrics_df_and_figs(tuple(metrics_df.itertuples(index=False, name=None)))
+    
     # Display metrics table
     st.dataframe(metrics_df)
     
@@ -408,54 +760,51 @@ def display_comparison_metrics():
     col1, col2 = st.columns(2)
     
     with col1:
-        # Token usage
-        fig1 = px.bar(
-            metrics_df, 
-            x="Model", 
-            y="Total Tokens", 
-            title="Token Usage by Model",
-            color="Model"
-        )
         st.plotly_chart(fig1, use_container_width=True)
     
     with col2:
-        # Cost comparison
-        fig2 = px.bar(
-            metrics_df, 
-            x="Model", 
-            y="Cost ($)", 
-            title="Cost Comparison",
-            color="Model"
-        )
         st.plotly_chart(fig2, use_container_width=True)
     
-    # Latency comparison
-    fig3 = px.bar(
-        metrics_df, 
-        x="Model", 
-        y="Latency (s)", 
-        title="Response Time Comparison",
-        color="Model"
-    )
     st.plotly_chart(fig3, use_container_width=True)
 
+def append_comparison_to_file(entry):
+    """Append one comparison to the JSONL history export, leaving out render caches"""
+    exportable = {
+        **entry,
+        "responses": {
+            model_id: {key: value for key, value in response_data.items() if not key.startswith("_")}
+            for model_id, response_data in entry["responses"].items()
+        }
+    }
+    
+    # Create exports directory if it doesn't exist
+    os.makedirs(os.path.dirname(HISTORY_EXPORT_PATH), exist_ok=True)
+    with open(HISTORY_EXPORT_PATH, "ab") as f:
+        f.write(_dump_line(exportable))
+
 def save_comparison_to_file():
-    """Save the current comparison to a JSON file"""
+    """Report where comparisons are saved (each one is appended as it finishes)"""
     if not st.session_state.comparison_history:
         st.warning("No comparisons to save.")
         return
     
-    # Create exports directory if it doesn't exist
-    os.makedirs("exports", exist_ok=True)
-    
-    # Generate filename based on timestamp
-    filename = f"exports/model_comparison_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    st.success(f"Comparisons saved to {HISTORY_EXPORT_PATH}")
+
+@st.cache_data
+def group_models_by_provider(models):
+    """Group (model_id, name) pairs by provider in model ID order (cached, recomputed only when models change)"""
+    providers = defaultdict(list)
     
-    # Save to file
-    with open(filename, "w") as f:
-        json.dump(st.session_state.comparison_history, f, indent=2)
+    for model_id, model_info in sorted(models.items()):
+        providers[model_info.get("provider", "Other")].append((model_id, model_info.get("name", model_id)))
     
-    st.success(f"Comparison saved to {filename}")
+    return dict(providers)
+
+def set_model_selection(models, selected):
+    """Select or clear every model, keeping the sidebar checkboxes in sync"""
+    st.session_state.selected_models = set(models) if selected else set()
+    for model_id in models:
+        st.session_state[f"model_{model_id}"] = selected
 
 def display_sidebar(config, router):
     """Display and handle sidebar elements"""
@@ -464,62 +813,38 @@ def display_sidebar(config, router):
     # Model selection
     st.sidebar.markdown("### Select Models to Compare")
     
-    # Get available models from config
-    available_models = sorted(config.get("models", {}).keys())
-    
-    # Group models by provider
-    models_by_provider = {}
-    for model_id in available_models:
-        model_info = config.get("models", {}).get(model_id, {})
-        provider = model_info.get("provider", "Other")
-        
-        if provider not in models_by_provider:
-            models_by_provider[provider] = []
-        
-        models_by_provider[provider].append(model_id)
-    
     # Select models by provider
-    for provider, models in models_by_provider.items():
+    for provider, models in group_models_by_provider(config.get("models", {})).items():
         st.sidebar.markdown(f"**{provider}**")
-        for model_id in models:
-            model_name = config.get("models", {}).get(model_id, {}).get("name", model_id)
-            
-            if st.sidebar.checkbox(model_name, model_id in st.session_state.selected_models, key=f"model_{model_id}"):
-                if model_id not in st.session_state.selected_models:
-                    st.session_state.selected_models.append(model_id)
+        for model_id, model_name in models:
+            if st.sidebar.checkbox(model_name, key=f"model_{model_id}"):
+                st.session_state.selected_models.add(model_id)
             else:
-                if model_id in st.session_state.selected_models:
-                    st.session_state.selected_models.remove(model_id)
+                st.session_state.selected_models.discard(model_id)
     
     # Quick model selection
     st.sidebar.markdown("### Quick Selection")
     
+    # Callbacks run before the next script run, so the checkboxes can be updated to match
     col1, col2 = st.sidebar.columns(2)
     with col1:
-        if st.button("Select All"):
-            st.session_state.selected_models = available_models.copy()
-            st.rerun()
+        st.button("Select All", on_click=set_model_selection, args=(config.get("models", {}), True))
     
     with col2:
-        if st.button("Clear Selection"):
-            st.session_state.selected_models = []
-            st.rerun()
+        st.button("Clear Selection", on_click=set_model_selection, args=(config.get("models", {}), False))
     
     st.sidebar.markdown("---")
     
     # Comparison settings
     st.sidebar.markdown("### Comparison Settings")
     
-    # System prompt
-    system_prompt = st.sidebar.text_area(
+    # System prompt (the widget writes straight to st.session_state.system_prompt)
+    st.sidebar.text_area(
         "System Prompt",
-        value=st.session_state.system_prompt,
+        key="system_prompt",
         height=100
     )
     
-    if system_prompt != st.session_state.system_prompt:
-        st.session_state.system_prompt = system_prompt
-    
     # View type
     view_options = {
         "side_by_side": "Side by Side",
@@ -542,6 +867,18 @@ def display_sidebar(config, router):
         value=st.session_state.highlight_differences
     )
     
+    # History size; resizing keeps the most recent comparisons
+    history_size = st.sidebar.number_input(
+        "Comparisons Kept in History",
+        min_value=1,
+        max_value=500,
+        value=st.session_state.history_size
+    )
+    
+    if history_size != st.session_state.history_size:
+        st.session_state.history_size = history_size
+        st.session_state.comparison_history = deque(st.session_state.comparison_history, maxlen=history_size)
+    
     st.sidebar.markdown("---")
     
     # Export options
@@ -554,23 +891,25 @@ def display_prompt_area():
     """Display the prompt input area"""
     st.markdown("### Enter your prompt")
     
-    prompt = st.text_area(
-        "Prompt",
-        value=st.session_state.current_prompt,
-        height=150,
-        placeholder="Enter your prompt here..."
-    )
-    
-    if prompt != st.session_state.current_prompt:
-        st.session_state.current_prompt = prompt
-    
-    # Compare button
-    col1, col2 = st.columns([1, 5])
-    with col1:
-        if st.button("Compare Models", disabled=st.session_state.compare_running):
-            compare_responses()
+    # A form, so typing doesn't rerun the page; the prompt is committed on submit
+    with st.form("compare_form"):
+        st.text_area(
+            "Prompt",
+            key="current_prompt",
+            height=150,
+            placeholder="Enter your prompt here..."
+        )
+        
+        # Compare button
+        col1, col2 = st.columns([1, 5])
+        with col1:
+            compare_clicked = st.form_submit_button("Compare Models", disabled=st.session_state.compare_running)
+    
+    # Run outside the narrow button column so the live preview gets the full width
+    if compare_clicked:
+        compare_responses()
 
-def display_comparison_results():
+def display_comparison_results(config):
     """Display the comparison results"""
     if not st.session_state.model_responses:
         return
@@ -580,9 +919,9 @@ def display_comparison_results():
     
     # Display based on selected view
     if st.session_state.comparison_view == "side_by_side":
-        display_side_by_side_comparison()
+        display_side_by_side_comparison(config)
     else:
-        display_tabbed_comparison()
+        display_tabbed_comparison(config)
     
     # Display metrics
     st.markdown("---")
@@ -590,12 +929,17 @@ def display_comparison_results():
 
 def main():
     """Main application function"""
-    # Initialize session state
-    initialize_session_state()
-    
     # Load configuration
     config = load_config()
     
+    # Initialize session state
+    initialize_session_state(config)
+    
+    # Prime DNS, TCP and TLS in the background while the user writes a prompt
+    if not st.session_state.get("warmed"):
+        st.session_state.warmed = True
+        threading.Thread(target=warm_up_connection, args=(get_http_session(),), daemon=True).start()
+    
     # Initialize router (for helpers and cost calculation)
     router = initialize_router(config)
     
@@ -619,7 +963,7 @@ def main():
     display_prompt_area()
     
     # Display comparison results
-    display_comparison_results()
+    display_comparison_results(config)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
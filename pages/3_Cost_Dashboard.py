@@ -15,8 +15,10 @@ from datetime import datetime, timedelta
 import matplotlib.pyplot as plt
 from streamlit_echarts import st_echarts
 
-# Add the src directory to the path
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Add the project root to the path (once; Streamlit re-executes this script on every rerun)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
 
 # Import the required modules
 try:
@@ -1,7 +1,7 @@
 from typing import Dict, List, Any, Optional
 import re
 import logging
-from model_client import OpenRouterClient
+from model_client import OpenRouterClient, configure_file_logging
 
 class ModelRouter:
     """
@@ -14,6 +14,7 @@ class ModelRouter:
         self.prompt_types = config.get("prompt_types", {})
         self.default_model = config.get("default_model")
         self.client = OpenRouterClient()
+        configure_file_logging()
         
         # Set up logging
         logging.basicConfig(
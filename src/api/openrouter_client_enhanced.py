@@ -2,7 +2,7 @@ import os
 import json
 import time
 import requests
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Union
 import logging
 from datetime import datetime
 import warnings
@@ -16,12 +16,32 @@ logging.basicConfig(
     filemode='a'
 )
 
+# (path, mtime, result) of the last .env parse; None until the first parse
+_ENV_CACHE: Optional[Tuple[str, float, bool]] = None
+
 def load_environment():
-    """Load environment variables from .env file if available"""
+    """
+    Load environment variables from .env file if available
+    
+    Requests without an API key call this on every send, so the parse result
+    is cached and the file is only parsed again when it changes (an empty
+    .env is parsed once, not on every call).
+    """
+    global _ENV_CACHE
     try:
-        from dotenv import load_dotenv
+        from dotenv import load_dotenv, find_dotenv
+        
         # Try to load from a .env file if it exists
-        env_loaded = load_dotenv()
+        env_path = find_dotenv()
+        if not env_path:
+            return False
+        
+        mtime = os.path.getmtime(env_path)
+        if _ENV_CACHE is not None and _ENV_CACHE[:2] == (env_path, mtime):
+            return _ENV_CACHE[2]
+        
+        env_loaded = load_dotenv(env_path)
+        _ENV_CACHE = (env_path, mtime, env_loaded)
         if env_loaded:
             logging.info("Environment variables loaded from .env file")
         return env_loaded
@@ -72,30 +92,26 @@ def check_api_key(api_key: Optional[str] = None) -> str:
         "the variable in your shell."
     )
 
-def send_prompt_to_openrouter(
+OPENROUTER_CHAT_URL = "https://openrouter.ai/api/v1/chat/completions"
+
+def _prepare_request(
     messages: List[Dict[str, str]],
     model: str,
-    api_key: Optional[str] = None,
-    temperature: float = 0.7,
-    max_tokens: int = 1000,
+    api_key: Optional[str],
+    temperature: float,
+    max_tokens: int,
     **kwargs
-) -> Tuple[str, Dict[str, Any], float]:
+) -> Tuple[Dict[str, str], Dict[str, Any]]:
     """
-    Send a prompt to the OpenRouter API and return the response with detailed metrics.
+    Validate the messages, resolve the API key and build the request
+    
+    Shared by the blocking and streaming senders.
     
-    Args:
-        messages: List of message dictionaries with 'role' and 'content' keys
-        model: The model ID to use (e.g., 'anthropic/claude-3-opus')
-        api_key: OpenRouter API key (will use env var if not provided)
-        temperature: Controls randomness (0-1)
-        max_tokens: Maximum number of tokens to generate
-        **kwargs: Additional parameters to pass to the API
-        
     Returns:
-        Tuple containing:
-        - response_text: The text response from the model
-        - usage_stats: Dictionary with token usage statistics
-        - latency: The round-trip time in seconds
+        Tuple of (headers, payload)
+        
+    Raises:
+        ValueError: If the messages are invalid or no API key is found
     """
     # Make sure messages is valid
     if not messages:
@@ -136,13 +152,87 @@ def send_prompt_to_openrouter(
         **kwargs
     }
     
+    return headers, payload
+
+def _usage_stats(usage: Dict[str, Any], model: str, latency: float, **extra) -> Dict[str, Any]:
+    """Build the usage statistics dictionary returned to callers"""
+    return {
+        "prompt_tokens": usage.get("prompt_tokens", 0),
+        "completion_tokens": usage.get("completion_tokens", 0),
+        "total_tokens": usage.get("total_tokens", 0),
+        "model": model,
+        "latency": latency,
+        **extra,
+        "timestamp": datetime.now().isoformat()
+    }
+
+def _log_success(model: str, latency: float, usage_stats: Dict[str, Any], **extra) -> None:
+    """Log the request and response metrics"""
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "latency": latency,
+        "status": "success",
+        **extra,
+        **usage_stats
+    }
+    logging.info(json.dumps(log_entry))
+
+def _request_error(model: str, start_time: float, error: Exception) -> RuntimeError:
+    """Log a failed request and return the RuntimeError to raise in its place"""
+    # Calculate latency even for errors
+    latency = time.time() - start_time
+    
+    # Log the error
+    log_entry = {
+        "timestamp": datetime.now().isoformat(),
+        "model": model,
+        "latency": latency,
+        "status": "error",
+        "error": str(error)
+    }
+    logging.error(json.dumps(log_entry))
+    
+    # Re-raise the exception with more context
+    return RuntimeError(f"Error calling OpenRouter API: {str(error)}. Latency: {latency:.2f}s")
+
+def send_prompt_to_openrouter(
+    messages: List[Dict[str, str]],
+    model: str,
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    session: Optional[requests.Session] = None,
+    **kwargs
+) -> Tuple[str, Dict[str, Any], float]:
+    """
+    Send a prompt to the OpenRouter API and return the response with detailed metrics.
+    
+    Args:
+        messages: List of message dictionaries with 'role' and 'content' keys
+        model: The model ID to use (e.g., 'anthropic/claude-3-opus')
+        api_key: OpenRouter API key (will use env var if not provided)
+        temperature: Controls randomness (0-1)
+        max_tokens: Maximum number of tokens to generate
+        session: requests.Session to send through so keep-alive connections
+            are reused across calls (a one-off connection if not provided)
+        **kwargs: Additional parameters to pass to the API
+        
+    Returns:
+        Tuple containing:
+        - response_text: The text response from the model
+        - usage_stats: Dictionary with token usage statistics
+        - latency: The round-trip time in seconds
+    """
+    headers, payload = _prepare_request(messages, model, api_key, temperature, max_tokens, **kwargs)
+    
     # Record start time for latency calculation
     start_time = time.time()
     
     try:
         # Make the API request
-        response = requests.post(
-            "https://openrouter.ai/api/v1/chat/completions",
+        response = (session or requests).post(
+            OPENROUTER_CHAT_URL,
             headers=headers,
             json=payload,
             timeout=kwargs.get("timeout", 60)
@@ -173,44 +263,110 @@ def send_prompt_to_openrouter(
             
         response_text = response_data.get("choices", [{}])[0].get("message", {}).get("content", "")
         
-        # Extract usage statistics
-        usage_stats = {
-            "prompt_tokens": response_data.get("usage", {}).get("prompt_tokens", 0),
-            "completion_tokens": response_data.get("usage", {}).get("completion_tokens", 0),
-            "total_tokens": response_data.get("usage", {}).get("total_tokens", 0),
-            "model": response_data.get("model", model),
-            "latency": latency,
-            "timestamp": datetime.now().isoformat()
-        }
-        
-        # Log the request and response metrics
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "model": model,
-            "latency": latency,
-            "status": "success",
-            **usage_stats
-        }
-        logging.info(json.dumps(log_entry))
+        usage_stats = _usage_stats(response_data.get("usage", {}), response_data.get("model", model), latency)
+        _log_success(model, latency, usage_stats)
         
         return response_text, usage_stats, latency
         
     except requests.exceptions.RequestException as e:
-        # Calculate latency even for errors
-        latency = time.time() - start_time
+        raise _request_error(model, start_time, e)
+
+
+def stream_prompt_to_openrouter(
+    messages: List[Dict[str, str]],
+    model: str,
+    api_key: Optional[str] = None,
+    temperature: float = 0.7,
+    max_tokens: int = 1000,
+    session: Optional[requests.Session] = None,
+    **kwargs
+) -> Iterator[Union[str, Dict[str, Any]]]:
+    """
+    Stream a prompt to the OpenRouter API, yielding text as it is generated.
+    
+    Args:
+        messages: List of message dictionaries with 'role' and 'content' keys
+        model: The model ID to use (e.g., 'anthropic/claude-3-opus')
+        api_key: OpenRouter API key (will use env var if not provided)
+        temperature: Controls randomness (0-1)
+        max_tokens: Maximum number of tokens to generate
+        session: requests.Session to send through so keep-alive connections
+            are reused across calls (a one-off connection if not provided)
+        **kwargs: Additional parameters to pass to the API
         
-        # Log the error
-        log_entry = {
-            "timestamp": datetime.now().isoformat(),
-            "model": model,
-            "latency": latency,
-            "status": "error",
-            "error": str(e)
-        }
-        logging.error(json.dumps(log_entry))
-        
-        # Re-raise the exception with more context
-        raise RuntimeError(f"Error calling OpenRouter API: {str(e)}. Latency: {latency:.2f}s")
+    Yields:
+        Text chunks (str) as they arrive, followed by a final usage_stats
+        dictionary with the same keys as send_prompt_to_openrouter returns,
+        plus 'first_token_latency'
+    """
+    # Ask for usage in the final streamed chunk
+    headers, payload = _prepare_request(
+        messages, model, api_key, temperature, max_tokens,
+        stream=True, usage={"include": True}, **kwargs
+    )
+    
+    # Record start time for latency calculation
+    start_time = time.time()
+    first_token_latency = None
+    usage = {}
+    response_model = model
+    
+    try:
+        with (session or requests).post(
+            OPENROUTER_CHAT_URL,
+            headers=headers,
+            json=payload,
+            timeout=kwargs.get("timeout", 60),
+            stream=True
+        ) as response:
+            if response.status_code != 200:
+                error_msg = f"OpenRouter API Error (Status {response.status_code}): {response.text}"
+                logging.error(error_msg)
+                raise RuntimeError(error_msg)
+            
+            # Server-sent events: "data: {...}" lines, ":" comment keep-alives, "data: [DONE]" at the end
+            response.encoding = "utf-8"
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data: "):
+                    continue
+                data = line[len("data: "):]
+                if data == "[DONE]":
+                    break
+                
+                try:
+                    chunk = json.loads(data)
+                except ValueError as e:
+                    error_msg = f"OpenRouter API Error: malformed stream chunk ({e}): {data[:200]}"
+                    logging.error(error_msg)
+                    raise RuntimeError(error_msg)
+                if "error" in chunk:
+                    error_msg = f"OpenRouter API Error: {json.dumps(chunk['error'])}"
+                    logging.error(error_msg)
+                    raise RuntimeError(error_msg)
+                
+                response_model = chunk.get("model", response_model)
+                if chunk.get("usage"):
+                    usage = chunk["usage"]
+                
+                choices = chunk.get("choices") or [{}]
+                text = choices[0].get("delta", {}).get("content")
+                if text:
+                    if first_token_latency is None:
+                        first_token_latency = time.time() - start_time
+                    yield text
+    except requests.exceptions.RequestException as e:
+        raise _request_error(model, start_time, e)
+    
+    # Calculate round-trip latency
+    latency = time.time() - start_time
+    
+    usage_stats = _usage_stats(
+        usage, response_model, latency,
+        first_token_latency=first_token_latency if first_token_latency is not None else latency
+    )
+    _log_success(model, latency, usage_stats, stream=True)
+    
+    yield usage_stats
 
 
 # Example usage:
@@ -1,11 +1,61 @@
 import yaml
 import os
-from typing import Dict, Any
+import copy
+import pickle
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Tuple
+
+# Use the libyaml-backed loader when available
+Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed configs keyed by absolute path, validated against (mtime, size)
+_YAML_CACHE_MAX = 100
+_YAML_CACHE: "OrderedDict[str, Tuple[float, int, Dict[str, Any]]]" = OrderedDict()
+_YAML_CACHE_LOCK = threading.Lock()
+
+# Only the app's own config gets a pickle sidecar; arbitrary --config paths are never unpickled
+_SIDECAR_CONFIG = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "config.yaml"
+)
+
+def _read_pickle_sidecar(pickle_path: str, stat: os.stat_result) -> Any:
+    """Return the config stored in a pickle sidecar if it matches the YAML file, else None"""
+    try:
+        with open(pickle_path, 'rb') as file:
+            mtime, size, config = pickle.load(file)
+    except Exception:
+        return None
+    if mtime != stat.st_mtime or size != stat.st_size:
+        return None
+    return config
+
+def _write_pickle_sidecar(pickle_path: str, stat: os.stat_result, config: Any) -> None:
+    """Atomically write the parsed config next to the YAML file (best effort)"""
+    tmp_path = None
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(pickle_path), suffix=".tmp")
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump((stat.st_mtime, stat.st_size, config), file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pickle_path)
+    except Exception:
+        if tmp_path is not None:
+            try:
+                os.remove(tmp_path)
+            except Exception:
+                pass
 
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     """
     Load the configuration from the YAML file
     
+    Parsed results are cached per file and only re-parsed when the file's
+    modification time or size changes, first in memory and then (for the
+    app's own config.yaml only) in a ``config.yaml.pkl`` sidecar so new
+    processes can skip YAML parsing. Callers
+    get a deep copy, so mutating the returned dict does not affect the cache.
+    
     Args:
         config_path: Path to the config file, defaults to config.yaml
         
@@ -13,9 +63,31 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
         Configuration dictionary
     """
     try:
-        with open(config_path, 'r') as file:
-            config = yaml.safe_load(file)
-        return config
+        path = os.path.abspath(config_path)
+        stat = os.stat(path)
+        
+        with _YAML_CACHE_LOCK:
+            cached = _YAML_CACHE.get(path)
+            if cached and cached[0] == stat.st_mtime and cached[1] == stat.st_size:
+                _YAML_CACHE.move_to_end(path)
+                return copy.deepcopy(cached[2])
+        
+        use_sidecar = path == _SIDECAR_CONFIG
+        pickle_path = path + ".pkl"
+        config = _read_pickle_sidecar(pickle_path, stat) if use_sidecar else None
+        if config is None:
+            with open(path, 'r') as file:
+                config = yaml.load(file, Loader=Loader)
+            if use_sidecar:
+                _write_pickle_sidecar(pickle_path, stat, config)
+        
+        with _YAML_CACHE_LOCK:
+            _YAML_CACHE[path] = (stat.st_mtime, stat.st_size, config)
+            _YAML_CACHE.move_to_end(path)
+            if len(_YAML_CACHE) > _YAML_CACHE_MAX:
+                _YAML_CACHE.popitem(last=False)
+        
+        return copy.deepcopy(config)
     except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found: {config_path}")
     except yaml.YAMLError as e:
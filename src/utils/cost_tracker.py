@@ -87,6 +87,91 @@ class CostTracker:
         Returns:
             The calculated cost
         """
+        log_entry = self._build_log_entry(model, usage_stats, session_id)
+        
+        # Append to CSV file
+        with open(self.log_file, "a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(list(log_entry.values()))
+        
+        # Update in-memory data
+        self.cost_data = self._load_cost_data()
+        
+        # Log the cost
+        cost_logger.info(f"API call logged: model={model}, tokens={log_entry['total_tokens']}, cost=${log_entry['cost']:.6f}")
+        
+        return log_entry["cost"]
+    
+    def log_batch(self, rows: List[Dict[str, Any]]) -> List[float]:
+        """
+        Log many API calls with a single CSV append and a single reload
+        
+        Args:
+            rows: Dictionaries with "model", "prompt_tokens", "completion_tokens",
+                and optionally "total_tokens", "session_id" and "timestamp"
+                (a datetime; defaults to now)
+        
+        Returns:
+            The calculated cost of each row, in order
+        """
+        return self.append_dataframe(pd.DataFrame(rows))["cost"].tolist()
+    
+    def append_dataframe(self, calls: pd.DataFrame) -> pd.DataFrame:
+        """
+        Log a DataFrame of API calls, pricing them in one vectorized pass
+        
+        Args:
+            calls: Columns "model", "prompt_tokens", "completion_tokens", and
+                optionally "total_tokens", "session_id" and "timestamp"
+        
+        Returns:
+            The rows as written, in CSV column order and including "cost"
+        """
+        n = len(calls)
+        now = datetime.now()
+        
+        # Fill optional columns
+        prompt_tokens = calls["prompt_tokens"].fillna(0).astype(int)
+        completion_tokens = calls["completion_tokens"].fillna(0).astype(int)
+        if "total_tokens" in calls:
+            total_tokens = calls["total_tokens"].fillna(0).astype(int)
+            total_tokens = total_tokens.where(total_tokens > 0, prompt_tokens + completion_tokens)
+        else:
+            total_tokens = prompt_tokens + completion_tokens
+        
+        timestamps = pd.to_datetime(calls["timestamp"]) if "timestamp" in calls else pd.Series([now] * n, index=calls.index)
+        timestamps = timestamps.fillna(now)
+        sessions = calls["session_id"] if "session_id" in calls else pd.Series([None] * n, index=calls.index, dtype=object)
+        sessions = sessions.fillna(self.current_session_id)
+        
+        # Price every row at once from the per-model rates
+        cost_per_1k = calls["model"].map(
+            {model: info.get("cost_per_1k_tokens", 0) for model, info in self.models.items()}
+        ).fillna(0)
+        
+        log_entries = pd.DataFrame({
+            "timestamp": timestamps.dt.strftime("%Y-%m-%d %H:%M:%S"),
+            "model": calls["model"],
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": total_tokens,
+            "cost": total_tokens * cost_per_1k / 1000,
+            "session_id": sessions
+        })
+        
+        # Append to CSV file
+        log_entries.to_csv(self.log_file, mode="a", header=False, index=False)
+        
+        # Update in-memory data
+        self.cost_data = self._load_cost_data()
+        
+        # Log the batch
+        cost_logger.info(f"API call batch logged: calls={n}, cost=${log_entries['cost'].sum():.6f}")
+        
+        return log_entries
+    
+    def _build_log_entry(self, model: str, usage_stats: Dict[str, Any], session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Build one cost log row, in CSV column order"""
         # Get model pricing info
         model_info = self.models.get(model, {})
         cost_per_1k = model_info.get("cost_per_1k_tokens", 0)
@@ -102,8 +187,7 @@ class CostTracker:
         # Use provided session ID or current session
         session = session_id or self.current_session_id
         
-        # Create log entry
-        log_entry = {
+        return {
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
             "model": model,
             "prompt_tokens": prompt_tokens,
@@ -112,27 +196,6 @@ class CostTracker:
             "cost": cost,
             "session_id": session
         }
-        
-        # Append to CSV file
-        with open(self.log_file, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                log_entry["timestamp"],
-                log_entry["model"],
-                log_entry["prompt_tokens"],
-                log_entry["completion_tokens"],
-                log_entry["total_tokens"],
-                log_entry["cost"],
-                log_entry["session_id"]
-            ])
-        
-        # Update in-memory data
-        self.cost_data = self._load_cost_data()
-        
-        # Log the cost
-        cost_logger.info(f"API call logged: model={model}, tokens={total_tokens}, cost=${cost:.6f}")
-        
-        return cost
     
     def get_session_summary(self, session_id: Optional[str] = None) -> Dict[str, Any]:
         """
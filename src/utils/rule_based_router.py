@@ -9,11 +9,11 @@ import os
 import re
 import logging
 import uuid
-from typing import Dict, List, Any, Optional, Tuple
+from typing import Dict, List, Any, Optional, Tuple, Iterator, Union
 import tiktoken
 from datetime import datetime
 
-from src.api.openrouter_client_enhanced import send_prompt_to_openrouter
+from src.api.openrouter_client_enhanced import send_prompt_to_openrouter, stream_prompt_to_openrouter
 from src.utils.cost_tracker import CostTracker
 from src.utils.model_call_logger import log_model_call
 
@@ -374,17 +374,52 @@ class RuleBasedRouter:
             "matched_patterns": self.matched_patterns if hasattr(self, 'matched_patterns') else {}
         }
     
-    def send_prompt(self, messages: List[Dict[str, str]], 
-                    model_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+    def add_cache_breakpoint(self, messages: List[Dict[str, Any]], model_id: str) -> List[Dict[str, Any]]:
         """
-        Send the prompt to the selected model and log metrics
+        Mark the stable conversation prefix as cacheable for the provider
+        
+        OpenRouter is stateless, so the full history is still sent each turn.
+        OpenAI-style providers cache a repeated prefix automatically; Anthropic
+        models need an explicit ``cache_control`` breakpoint, which is placed on
+        the last message before the new user turn (system prompt + prior turns).
+        The input list is not modified.
+        
+        Args:
+            messages: List of message dictionaries
+            model_id: The model the messages will be sent to
+            
+        Returns:
+            List of message dictionaries to send
+        """
+        if not model_id.startswith("anthropic/") or len(messages) < 2:
+            return messages
+        
+        prefix_end = messages[-2]
+        if not isinstance(prefix_end.get("content"), str):
+            return messages
+        
+        marked = dict(prefix_end)
+        marked["content"] = [{
+            "type": "text",
+            "text": prefix_end["content"],
+            "cache_control": {"type": "ephemeral"}
+        }]
+        return messages[:-2] + [marked, messages[-1]]
+    
+    def _prepare_request(self, messages: List[Dict[str, str]],
+                         model_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Select the model and gather everything a request needs
+        
+        Shared by send_prompt and send_prompt_stream.
         
         Args:
             messages: List of message dictionaries
             model_id: Optional model ID override
         
         Returns:
-            Tuple of (response_text, metrics)
+            Dictionary with the prompt, selected model, request parameters,
+            messages to send and the bookkeeping used for logging
         """
         # Get the user's prompt from the messages
         user_messages = [m for m in messages if m["role"] == "user"]
@@ -393,9 +428,6 @@ class RuleBasedRouter:
         
         prompt = user_messages[-1]["content"]
         
-        # Generate a unique identifier for this request
-        prompt_id = str(uuid.uuid4())
-        
         # Generate a session ID if not already in the metrics
         session_id = getattr(self, 'session_id', str(uuid.uuid4()))
         self.session_id = session_id
@@ -413,16 +445,11 @@ class RuleBasedRouter:
             # If manually selected, we don't have routing explanations
             original_strategy = "manual"
             self.model_selection_explanation = f"Model {model_id} was manually selected by the user."
-            # For manually selected models, we still want to classify the prompt type for logging
-            prompt_type = self.classify_prompt(prompt)
-            length_category = self.determine_length_category(self.estimate_token_count(prompt))
-        
-        # Get routing explanation for logging
-        routing_explanation = self.get_routing_explanation() if hasattr(self, 'get_routing_explanation') else {}
+            # For manually selected models, we still want to classify the prompt for logging
+            self.classify_prompt(prompt)
         
         # Get model-specific parameters
         model_info = self.models.get(model_id, {})
-        temperature = model_info.get("temperature", 0.7)
         
         # Use a reasonable max_tokens value (either from config or default to 1000)
         # This is the maximum number of tokens to generate in the response
@@ -437,118 +464,202 @@ class RuleBasedRouter:
         prompt_tokens = self.estimate_token_count(prompt)
         logger.info(f"Estimated prompt tokens: {prompt_tokens}, max response tokens: {max_tokens}")
         
-        # Record start time
-        start_time = datetime.now()
-        error_type = None
+        return {
+            "prompt": prompt,
+            # Unique identifier for this request
+            "prompt_id": str(uuid.uuid4()),
+            "session_id": session_id,
+            "model_id": model_id,
+            "manual_selection": manual_selection,
+            "strategy": original_strategy,
+            # Routing explanation for logging
+            "routing_explanation": self.get_routing_explanation(),
+            "temperature": model_info.get("temperature", 0.7),
+            "max_tokens": max_tokens,
+            "prompt_tokens": prompt_tokens,
+            # Let the provider reuse its cache for the unchanged history
+            "messages": self.add_cache_breakpoint(messages, model_id),
+            "start_time": datetime.now()
+        }
+    
+    def _record_success(self, request: Dict[str, Any], response_text: str,
+                        usage_stats: Dict[str, Any], latency: Optional[float],
+                        max_tokens: int, retry: bool = False,
+                        stream: bool = False) -> Dict[str, Any]:
+        """
+        Build the metrics for a completed request and log cost, call and interaction
+        
+        Args:
+            request: Dictionary returned by _prepare_request
+            response_text: The model's response
+            usage_stats: Usage statistics returned by the API client
+            latency: Round-trip latency, or None to take it from usage_stats
+            max_tokens: max_tokens the request was sent with
+            retry: Whether this was a retry with reduced max_tokens
+            stream: Whether the response was streamed
+        
+        Returns:
+            Metrics dictionary
+        """
+        # Record end time and calculate duration
+        end_time = datetime.now()
+        duration = (end_time - request["start_time"]).total_seconds()
+        if latency is None:
+            latency = usage_stats.get("latency", duration)
+        
+        # Classify prompt type for logging
+        prompt = request["prompt"]
+        prompt_type = self.classify_prompt(prompt)
+        length_category = self.determine_length_category(request["prompt_tokens"])
+        
+        # Create metrics dictionary
+        metrics = {
+            "model": request["model_id"],
+            "prompt_type": prompt_type,
+            "token_count": usage_stats.get("total_tokens", 0),
+            "prompt_tokens": usage_stats.get("prompt_tokens", 0),
+            "completion_tokens": usage_stats.get("completion_tokens", 0),
+            "latency": latency
+        }
+        if stream:
+            metrics["first_token_latency"] = usage_stats.get("first_token_latency", latency)
+        metrics.update({
+            "duration": duration,
+            "timestamp": end_time.isoformat(),
+            "usage_stats": usage_stats,
+            "routing_explanation": request["routing_explanation"],
+            "session_id": request["session_id"],
+            "prompt_id": request["prompt_id"]
+        })
+        
+        additional_metadata = {
+            "duration": duration,
+            "temperature": request["temperature"],
+            "max_tokens": max_tokens
+        }
+        if retry:
+            # Indicate this was a retry
+            metrics["retry"] = True
+            additional_metadata["retry"] = True
+        if stream:
+            additional_metadata["stream"] = True
+        
+        # Log costs using the cost tracker
+        self.cost_tracker.log_api_call(
+            model=request["model_id"],
+            usage_stats=usage_stats
+        )
+        
+        # Log the model call with routing explanation
+        log_model_call(
+            session_id=request["session_id"],
+            model_id=request["model_id"],
+            prompt_type=prompt_type,
+            prompt_query=prompt,
+            usage_stats=usage_stats,
+            routing_explanation=request["routing_explanation"],
+            prompt_id=request["prompt_id"],
+            length_category=length_category,
+            strategy=request["strategy"],
+            manual_selection=request["manual_selection"],
+            latency=latency,
+            success=True,
+            matched_patterns=getattr(self, 'matched_patterns', {}),
+            additional_metadata=additional_metadata
+        )
+        
+        # Log the request/response details
+        self.log_interaction(prompt, response_text, metrics)
+        
+        return metrics
+    
+    def _record_failure(self, request: Dict[str, Any], error_type: str,
+                        max_tokens: int, retry: bool = False) -> None:
+        """
+        Log a failed model call (never raises)
         
+        Args:
+            request: Dictionary returned by _prepare_request
+            error_type: Description of the error
+            max_tokens: max_tokens the request was sent with
+            retry: Whether this was a retry with reduced max_tokens
+        """
         try:
-            # Send to OpenRouter
-            response_text, usage_stats, latency = send_prompt_to_openrouter(
-                messages=messages,
-                model=model_id,
-                temperature=temperature,
-                max_tokens=max_tokens
-            )
-            
-            # Record end time and calculate duration
+            # Determine execution time even for failed calls
             end_time = datetime.now()
-            duration = (end_time - start_time).total_seconds()
+            duration = (end_time - request["start_time"]).total_seconds()
+            prompt_tokens = request["prompt_tokens"]
             
-            # Classify prompt type for logging
-            prompt_type = self.classify_prompt(prompt)
-            length_category = self.determine_length_category(prompt_tokens)
+            # Create basic usage stats for failed calls
+            failed_usage_stats = {
+                "prompt_tokens": prompt_tokens,
+                "completion_tokens": 0,
+                "total_tokens": prompt_tokens,
+                "cost": 0
+            }
             
-            # Create metrics dictionary
-            metrics = {
-                "model": model_id,
-                "prompt_type": prompt_type,
-                "token_count": usage_stats.get("total_tokens", 0),
-                "prompt_tokens": usage_stats.get("prompt_tokens", 0),
-                "completion_tokens": usage_stats.get("completion_tokens", 0),
-                "latency": latency,
+            additional_metadata = {
                 "duration": duration,
-                "timestamp": end_time.isoformat(),
-                "usage_stats": usage_stats,
-                "routing_explanation": routing_explanation,
-                "session_id": session_id,
-                "prompt_id": prompt_id
+                "temperature": request["temperature"],
+                "max_tokens": max_tokens
             }
+            if retry:
+                additional_metadata["retry"] = True
             
-            # Log costs using the cost tracker
-            self.cost_tracker.log_api_call(
-                model=model_id,
-                usage_stats=usage_stats
-            )
-            
-            # Log the model call with routing explanation
+            # Log the failed model call
             log_model_call(
-                session_id=session_id,
-                model_id=model_id,
-                prompt_type=prompt_type,
-                prompt_query=prompt,
-                usage_stats=usage_stats,
-                routing_explanation=routing_explanation,
-                prompt_id=prompt_id,
-                length_category=length_category,
-                strategy=original_strategy,
-                manual_selection=manual_selection,
-                latency=latency,
-                success=True,
-                matched_patterns=getattr(self, 'matched_patterns', {}) if hasattr(self, 'matched_patterns') else {},
-                additional_metadata={
-                    "duration": duration,
-                    "temperature": temperature,
-                    "max_tokens": max_tokens
-                }
+                session_id=request["session_id"],
+                model_id=request["model_id"],
+                prompt_type=getattr(self, 'prompt_type', "unknown"),
+                prompt_query=request["prompt"],
+                usage_stats=failed_usage_stats,
+                routing_explanation=request["routing_explanation"],
+                prompt_id=request["prompt_id"],
+                length_category=self.determine_length_category(prompt_tokens),
+                strategy=request["strategy"],
+                manual_selection=request["manual_selection"],
+                latency=duration,
+                success=False,
+                error_type=error_type,
+                matched_patterns=getattr(self, 'matched_patterns', {}),
+                additional_metadata=additional_metadata
+            )
+        except Exception as log_error:
+            logger.error(f"Error logging failed {'retry' if retry else 'call'}: {log_error}")
+    
+    def send_prompt(self, messages: List[Dict[str, str]], 
+                    model_id: Optional[str] = None) -> Tuple[str, Dict[str, Any]]:
+        """
+        Send the prompt to the selected model and log metrics
+        
+        Args:
+            messages: List of message dictionaries
+            model_id: Optional model ID override
+        
+        Returns:
+            Tuple of (response_text, metrics)
+        """
+        request = self._prepare_request(messages, model_id)
+        model_id = request["model_id"]
+        max_tokens = request["max_tokens"]
+        
+        try:
+            # Send to OpenRouter
+            response_text, usage_stats, latency = send_prompt_to_openrouter(
+                messages=request["messages"],
+                model=model_id,
+                temperature=request["temperature"],
+                max_tokens=max_tokens
             )
             
-            # Log the request/response details
-            self.log_interaction(prompt, response_text, metrics)
-            
-            return response_text, metrics
+            return response_text, self._record_success(request, response_text, usage_stats, latency, max_tokens)
             
         except Exception as e:
             logger.error(f"Error sending prompt to {model_id}: {e}")
             error_type = str(e)
             
             # Log the failed call
-            try:
-                # Determine execution time even for failed calls
-                end_time = datetime.now()
-                duration = (end_time - start_time).total_seconds()
-                
-                # Create basic usage stats for failed calls
-                failed_usage_stats = {
-                    "prompt_tokens": prompt_tokens,
-                    "completion_tokens": 0,
-                    "total_tokens": prompt_tokens,
-                    "cost": 0
-                }
-                
-                # Log the failed model call
-                log_model_call(
-                    session_id=session_id,
-                    model_id=model_id,
-                    prompt_type=getattr(self, 'prompt_type', "unknown"),
-                    prompt_query=prompt,
-                    usage_stats=failed_usage_stats,
-                    routing_explanation=routing_explanation,
-                    prompt_id=prompt_id,
-                    length_category=length_category if 'length_category' in locals() else None,
-                    strategy=original_strategy,
-                    manual_selection=manual_selection,
-                    latency=duration,
-                    success=False,
-                    error_type=error_type,
-                    matched_patterns=getattr(self, 'matched_patterns', {}) if hasattr(self, 'matched_patterns') else {},
-                    additional_metadata={
-                        "duration": duration,
-                        "temperature": temperature,
-                        "max_tokens": max_tokens
-                    }
-                )
-            except Exception as log_error:
-                logger.error(f"Error logging failed call: {log_error}")
+            self._record_failure(request, error_type, max_tokens)
             
             # Check if the error is related to token limits
             error_str = str(e).lower()
@@ -561,106 +672,21 @@ class RuleBasedRouter:
                 
                 try:
                     response_text, usage_stats, latency = send_prompt_to_openrouter(
-                        messages=messages,
+                        messages=request["messages"],
                         model=model_id,
-                        temperature=temperature,
+                        temperature=request["temperature"],
                         max_tokens=reduced_max_tokens
                     )
                     
-                    # Record end time and calculate duration
-                    end_time = datetime.now()
-                    duration = (end_time - start_time).total_seconds()
-                    
-                    # Classify prompt type for logging
-                    prompt_type = self.classify_prompt(prompt)
-                    
-                    # Create metrics dictionary
-                    metrics = {
-                        "model": model_id,
-                        "prompt_type": prompt_type,
-                        "token_count": usage_stats.get("total_tokens", 0),
-                        "latency": latency,
-                        "duration": duration,
-                        "timestamp": end_time.isoformat(),
-                        "usage_stats": usage_stats,
-                        "routing_explanation": routing_explanation,
-                        "session_id": session_id,
-                        "prompt_id": prompt_id,
-                        "retry": True  # Indicate this was a retry
-                    }
-                    
-                    # Log costs using the cost tracker
-                    self.cost_tracker.log_api_call(
-                        model=model_id,
-                        usage_stats=usage_stats
+                    metrics = self._record_success(
+                        request, response_text, usage_stats, latency, reduced_max_tokens, retry=True
                     )
-                    
-                    # Log the successful retry
-                    log_model_call(
-                        session_id=session_id,
-                        model_id=model_id,
-                        prompt_type=prompt_type,
-                        prompt_query=prompt,
-                        usage_stats=usage_stats,
-                        routing_explanation=routing_explanation,
-                        prompt_id=prompt_id,
-                        length_category=self.determine_length_category(prompt_tokens),
-                        strategy=original_strategy,
-                        manual_selection=manual_selection,
-                        latency=latency,
-                        success=True,
-                        matched_patterns=getattr(self, 'matched_patterns', {}) if hasattr(self, 'matched_patterns') else {},
-                        additional_metadata={
-                            "duration": duration,
-                            "temperature": temperature,
-                            "max_tokens": reduced_max_tokens,
-                            "retry": True
-                        }
-                    )
-                    
-                    # Log the request/response details
-                    self.log_interaction(prompt, response_text, metrics)
-                    
                     return response_text, metrics
                     
                 except Exception as retry_error:
                     logger.error(f"Still failed after reducing max_tokens: {retry_error}")
                     # Log the failed retry
-                    try:
-                        end_time = datetime.now()
-                        duration = (end_time - start_time).total_seconds()
-                        
-                        failed_usage_stats = {
-                            "prompt_tokens": prompt_tokens,
-                            "completion_tokens": 0,
-                            "total_tokens": prompt_tokens,
-                            "cost": 0
-                        }
-                        
-                        log_model_call(
-                            session_id=session_id,
-                            model_id=model_id,
-                            prompt_type=getattr(self, 'prompt_type', "unknown"),
-                            prompt_query=prompt,
-                            usage_stats=failed_usage_stats,
-                            routing_explanation=routing_explanation,
-                            prompt_id=prompt_id,
-                            length_category=self.determine_length_category(prompt_tokens),
-                            strategy=original_strategy,
-                            manual_selection=manual_selection,
-                            latency=duration,
-                            success=False,
-                            error_type=str(retry_error),
-                            matched_patterns=getattr(self, 'matched_patterns', {}) if hasattr(self, 'matched_patterns') else {},
-                            additional_metadata={
-                                "duration": duration,
-                                "temperature": temperature,
-                                "max_tokens": reduced_max_tokens,
-                                "retry": True
-                            }
-                        )
-                    except Exception as log_error:
-                        logger.error(f"Error logging failed retry: {log_error}")
+                    self._record_failure(request, str(retry_error), reduced_max_tokens, retry=True)
                     # Continue to fallback model logic
             
             # Try fallback model if different from current model
@@ -668,16 +694,17 @@ class RuleBasedRouter:
                 logger.info(f"Trying fallback model: {self.default_model}")
                 
                 # Log the fallback attempt
+                prompt_tokens = request["prompt_tokens"]
                 try:
                     log_model_call(
-                        session_id=session_id,
+                        session_id=request["session_id"],
                         model_id=model_id,
                         prompt_type=getattr(self, 'prompt_type', "unknown"),
-                        prompt_query=prompt,
+                        prompt_query=request["prompt"],
                         usage_stats={"prompt_tokens": prompt_tokens, "completion_tokens": 0, "total_tokens": prompt_tokens},
                         routing_explanation={"explanation": f"Falling back to {self.default_model} after error with {model_id}"},
-                        prompt_id=prompt_id,
-                        length_category=self.determine_length_category(prompt_tokens) if 'prompt_tokens' in locals() else None,
+                        prompt_id=request["prompt_id"],
+                        length_category=self.determine_length_category(prompt_tokens),
                         strategy="fallback",
                         manual_selection=False,
                         latency=0,
@@ -696,6 +723,59 @@ class RuleBasedRouter:
             # Propagate the error if no fallback available
             raise
     
+    def send_prompt_stream(self, messages: List[Dict[str, str]],
+                           model_id: Optional[str] = None) -> Iterator[Union[str, Dict[str, Any]]]:
+        """
+        Stream the prompt to the selected model, yielding text as it arrives
+        
+        If the stream fails before any text is received, this falls back to
+        send_prompt, which handles token-limit retries and the default model.
+        
+        Args:
+            messages: List of message dictionaries
+            model_id: Optional model ID override
+        
+        Yields:
+            Text chunks (str), followed by the metrics dictionary (same shape
+            as the one returned by send_prompt)
+        """
+        request = self._prepare_request(messages, model_id)
+        model_id = request["model_id"]
+        response_chunks = []
+        usage_stats = {}
+        
+        try:
+            for item in stream_prompt_to_openrouter(
+                messages=request["messages"],
+                model=model_id,
+                temperature=request["temperature"],
+                max_tokens=request["max_tokens"]
+            ):
+                if isinstance(item, dict):
+                    usage_stats = item
+                else:
+                    response_chunks.append(item)
+                    yield item
+        except Exception as e:
+            # Log the failed attempt before retrying or propagating
+            self._record_failure(request, str(e), request["max_tokens"])
+            
+            # Once text has been shown we cannot transparently retry
+            if response_chunks:
+                logger.error(f"Stream from {model_id} failed after partial output: {e}")
+                raise
+            
+            logger.warning(f"Streaming from {model_id} failed ({e}), falling back to a blocking request")
+            response_text, metrics = self.send_prompt(messages, model_id if request["manual_selection"] else None)
+            yield response_text
+            yield metrics
+            return
+        
+        response_text = "".join(response_chunks)
+        yield self._record_success(
+            request, response_text, usage_stats, None, request["max_tokens"], stream=True
+        )
+    
     def log_interaction(self, prompt: str, response: str, metrics: Dict[str, Any]) -> None:
         """
         Log the interaction details for analysis